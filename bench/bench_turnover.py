@@ -0,0 +1,132 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import synth
+
+'''
+Benchmark of edl_to_json and every exporter on synthetic EDLs and bins.
+Each stage runs in its own process so peak RSS is measured per stage, results are
+appended to a JSON file to compare releases.
+
+'''
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Repository root
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000] # Number of events of each synthetic EDL
+STAGES = ['edl_to_json', 'json_to_markers', 'json_to_subcaps', 'export_ale_pulls', 'export_pulls_edl', 'export_dummy_edl',
+          'export_google_tab', 'export_final_vfx_edl', 'turnover'] # Timed functions, in run order
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process in MB, None where the resource module is missing."""
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024 # Bytes on macOS, KB on Linux
+
+
+def run_stage(stage: str, edl_file_path: str) -> dict:
+    """Runs one stage on the files of a synthetic EDL in this process, returns its wall time and peak RSS."""
+    sys.path.insert(0, REPO_DIR)
+    import vfx_turnover
+
+    base = os.path.splitext(edl_file_path)[0]
+    json_file_path = base + '.json'
+    calls = { # Stage: function and arguments, output names as the CLI would use
+        'edl_to_json': (vfx_turnover.edl_to_json, edl_file_path, json_file_path),
+        'json_to_markers': (vfx_turnover.json_to_markers, json_file_path, base + '_markers.txt'),
+        'json_to_subcaps': (vfx_turnover.json_to_subcaps, json_file_path, base + '_subcaps.txt'),
+        'export_ale_pulls': (vfx_turnover.export_ale_pulls, json_file_path, base + '.ALE'),
+        'export_pulls_edl': (vfx_turnover.export_pulls_edl, json_file_path, base + '_pulls.edl'),
+        'export_dummy_edl': (vfx_turnover.export_dummy_edl, json_file_path, base + '_dummy.edl'),
+        'export_google_tab': (vfx_turnover.export_google_tab, json_file_path, base + '_TAB.txt'),
+        'export_final_vfx_edl': (vfx_turnover.export_final_vfx_edl, json_file_path, base + '_bin.txt', base + '_vfx_final.edl'),
+        'turnover': (vfx_turnover.turnover, edl_file_path, vfx_turnover.DEFAULT_OUTPUTS),
+    }
+    function, *arguments = calls[stage]
+    start = time.perf_counter()
+    function(*arguments)
+    return {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_benchmarks(sizes: list, stages: list, work_dir: str) -> list:
+    """Generates a synthetic EDL and bin for each size and times every stage in a separate process."""
+    results = []
+    for size in sizes:
+        edl_file_path = os.path.join(work_dir, f'synthetic_{size}.edl')
+        vfx_ids = synth.write_synthetic_edl(edl_file_path, size)
+        synth.write_synthetic_bin(os.path.splitext(edl_file_path)[0] + '_bin.txt', vfx_ids)
+        for stage in stages:
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--stage', stage, edl_file_path],
+                                       check=True, capture_output=True, text=True) # Fresh process, peak RSS of this stage only
+            result = json.loads(completed.stdout.splitlines()[-1])
+            result.update({"stage": stage, "events": size, "events_per_s": size / result["seconds"] if result["seconds"] else None})
+            results.append(result)
+            print(f"{size:>8} events  {stage:<22} {result['seconds']:9.3f} s  {result['events_per_s']:>12,.0f} events/s  "
+                  f"peak {result['peak_rss_mb'] or 0:8.1f} MB")
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark edl_to_json and the exporters on synthetic EDLs')   # Define parser
+
+    parser.add_argument('-s', '--sizes', default=','.join(map(str, DEFAULT_SIZES)), metavar =(''), help='Comma separated numbers of events (default: %(default)s)')  # Define arguments
+    parser.add_argument('-t', '--stages', default=','.join(STAGES), metavar =(''), help='Comma separated stages among: ' + ', '.join(STAGES) + ' (default: all)')  # Define arguments
+    parser.add_argument('-o', '--output', default=os.path.join(REPO_DIR, 'bench', 'results.json'), metavar =(''), help='Results file, runs are appended (default: bench/results.json)')  # Define arguments
+    parser.add_argument('-k', '--keep', metavar =(''), help='Generate files in this directory and keep them (default: temporary directory)')  # Define arguments
+    parser.add_argument('--stage', nargs=2, metavar=('STAGE', 'EDL'), help=argparse.SUPPRESS)  # Internal: run one stage in this process
+
+    args = parser.parse_args() # Call function to parse arguments
+
+    if args.stage: # Child process, print result as JSON
+        with open(os.devnull, 'w') as devnull: # Silence the exporters messages
+            stdout = sys.stdout
+            sys.stdout = devnull
+            result = run_stage(*args.stage)
+            sys.stdout = stdout
+        print(json.dumps(result))
+        sys.exit(0)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = [stage.strip() for stage in args.stages.split(',')]
+    unknown_stages = [stage for stage in stages if stage not in STAGES]
+    if unknown_stages:
+        parser.error('unknown stages: ' + ', '.join(unknown_stages)) # Print error message and exit
+    if 'edl_to_json' not in stages and any(stage.startswith(('json_', 'export_')) for stage in stages):
+        stages.insert(0, 'edl_to_json') # Exporters read the JSON
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        results = run_benchmarks(sizes, stages, args.keep)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = run_benchmarks(sizes, stages, work_dir)
+
+    try:
+        git_revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError: # No git
+        git_revision = ''
+    run = {
+        "date": datetime.datetime.now().isoformat(timespec='seconds'),
+        "revision": git_revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    runs = []
+    if os.path.exists(args.output):
+        with open(args.output) as results_file:
+            runs = json.load(results_file) # Previous runs
+    runs.append(run)
+    with open(args.output, 'w') as results_file:
+        json.dump(runs, results_file, indent=4) # Write results to JSON file
+    print(f"Succesfully exported benchmark results: {args.output}")  # Print success message
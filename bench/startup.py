@@ -0,0 +1,51 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+'''
+Startup benchmark: times a markers export (-m) from the script or the frozen binary
+and fails when the median wall time is over budget.
+
+'''
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Repository root
+SAMPLE_JSON = os.path.join(REPO_DIR, 'test', 'EPSV_traccia VFX_129.json') # Sample JSON shipped with the repo
+
+
+def time_markers_export(command: list, json_file_path: str, runs: int) -> list:
+    """Runs a markers export runs times, returns the wall time of each run in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command + ['-m', json_file_path], check=True, stdout=subprocess.DEVNULL) # Markers export
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Time a markers export from vfx_turnover and check it against a startup budget')   # Define parser
+
+    parser.add_argument('-x', '--exe', metavar =(''), help='Frozen binary to time (default: vfx_turnover.py with this Python)')  # Define arguments
+    parser.add_argument('-n', '--runs', type=int, default=10, metavar =(''), help='Number of timed runs (default: %(default)s)')  # Define arguments
+    parser.add_argument('-b', '--budget', type=float, default=0.5, metavar =(''), help='Budget for the median run in seconds (default: %(default)s)')  # Define arguments
+
+    args = parser.parse_args() # Call function to parse arguments
+
+    command = [args.exe] if args.exe else [sys.executable, os.path.join(REPO_DIR, 'vfx_turnover.py')] # Command to time
+    with tempfile.TemporaryDirectory() as temp_dir: # Keep the markers file out of the repository
+        json_file_path = os.path.join(temp_dir, 'startup.json')
+        shutil.copyfile(SAMPLE_JSON, json_file_path)
+        time_markers_export(command, json_file_path, 1) # Warm up file and bytecode caches
+        timings = time_markers_export(command, json_file_path, args.runs)
+
+    median = statistics.median(timings)
+    print(f"Markers export: median {median:.3f} s, min {min(timings):.3f} s, max {max(timings):.3f} s over {args.runs} runs (budget {args.budget:.3f} s)")
+    if median > args.budget: # Check budget
+        print(f"Error: startup over budget by {median - args.budget:.3f} s")  # Print error message
+        sys.exit(1)
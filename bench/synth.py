@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+
+'''
+Synthetic Avid-style EDL and final VFX bin (TAB) generator for benchmarks.
+
+'''
+
+REEL_WIDTH = 134 # Padded reel column width of Avid EDLs
+FRAME_RATE = 24 # Frame rate of generated timecodes
+
+
+def frames_to_tc(frames: int) -> str:
+    """Converts a frame count to a HH:MM:SS:FF timecode string at 24 fps."""
+    seconds, ff = divmod(frames % (FRAME_RATE * 86400), FRAME_RATE)
+    minutes, ss = divmod(seconds, 60)
+    hh, mm = divmod(minutes, 60)
+    return f"{hh:02d}:{mm:02d}:{ss:02d}:{ff:02d}"
+
+
+def write_synthetic_edl(edl_file_path: str, events: int, marker_ratio: float = 0.5, film_code: str = 'EPSV', seed: int = 0) -> list:
+    """Writes an EDL of events shots, a marker_ratio share of them with a *LOC marker, the rest left to automatic VFX IDs.
+    Returns the VFX IDs the EDL parser will assign, in event order."""
+    rng = random.Random(seed) # Same EDL for the same arguments
+    vfx_ids = []
+    record = 3600 * FRAME_RATE # Record starts at 01:00:00:00
+    scene = 1
+    marker_counter = 0
+    auto_counter = 0
+    last_auto_scene = None # Automatic VFX IDs restart at 010 when the scene changes
+
+    with open(edl_file_path, 'w', buffering=1 << 20) as edl_file:
+        edl_file.write('TITLE:   SYNTHETIC VFX \nFCM: NON-DROP FRAME\n')
+        for event_number in range(1, events + 1):
+            if rng.random() < 0.15: # Next scene
+                scene += 1
+                marker_counter = 0
+            camera = rng.choice('AB')
+            reel = f"{camera}{rng.randrange(1, 200):03d}_C{rng.randrange(1, 60):03d}_{rng.randrange(0x100000, 0xFFFFFF):06X}_001"
+            source = rng.randrange(0, 20 * 3600 * FRAME_RATE) # Source anywhere in the first 20 hours
+            duration = rng.randrange(12, 400)
+            edl_file.write(f"{event_number:06d}  {reel:<{REEL_WIDTH}} V     C        {frames_to_tc(source)} {frames_to_tc(source + duration)} "
+                           f"{frames_to_tc(record)} {frames_to_tc(record + duration)} \n")
+            edl_file.write(f"*FROM CLIP NAME:  {scene}-{rng.randrange(1, 20)}-/{rng.randrange(1, 9):02d} {camera} + \n")
+            if rng.random() < marker_ratio: # Marker shot
+                marker_counter += 10
+                vfx_id = f"{film_code}_{scene:02d}_{marker_counter:03d}"
+                edl_file.write(f"*LOC: {frames_to_tc(record + duration // 2)} GREEN   {vfx_id} \n")
+            else: # Automatic VFX ID, as assigned by the parser
+                scene_clip = f"{scene:03d}"
+                auto_counter = auto_counter + 10 if scene_clip == last_auto_scene else 10
+                last_auto_scene = scene_clip
+                vfx_id = f"{film_code}_{scene_clip}_{auto_counter:03d}"
+            edl_file.write(f"*SOURCE FILE: {reel}\n")
+            vfx_ids.append(vfx_id)
+            record += duration
+    return vfx_ids
+
+
+def write_synthetic_bin(bin_file_path: str, vfx_ids: list, max_versions: int = 3, unmatched_ratio: float = 0.01, seed: int = 0):
+    """Writes an AVID final VFX bin export (TAB) with up to max_versions comps per VFX ID and some names matching no VFX ID."""
+    rng = random.Random(seed) # Same bin for the same arguments
+    with open(bin_file_path, 'w', buffering=1 << 20) as bin_file:
+        bin_file.write('Name\tTracks\tStart\tEnd\tDuration\n')
+        for vfx_id in vfx_ids:
+            for version in range(1, rng.randrange(1, max_versions + 1) + 1):
+                bin_file.write(f"{vfx_id}_v{version:03d}_comp\tV1\t00:00:00:00\t00:00:05:00\t5:00\n")
+            if rng.random() < unmatched_ratio:
+                bin_file.write(f"temp_slate_{rng.randrange(100000)}\tV1\t00:00:00:00\t00:00:05:00\t5:00\n")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Write a synthetic Avid-style EDL and its final VFX bin export')   # Define parser
+
+    parser.add_argument('events', type=int, help='Number of events')  # Define arguments
+    parser.add_argument('edl', help='EDL output file, the bin is written next to it as <name>_bin.txt')  # Define arguments
+    parser.add_argument('-m', '--marker_ratio', type=float, default=0.5, metavar =(''), help='Share of shots with a *LOC marker (default: %(default)s)')  # Define arguments
+    parser.add_argument('-s', '--seed', type=int, default=0, metavar =(''), help='Random seed (default: %(default)s)')  # Define arguments
+
+    args = parser.parse_args() # Call function to parse arguments
+
+    vfx_ids = write_synthetic_edl(args.edl, args.events, args.marker_ratio, seed=args.seed)
+    write_synthetic_bin(os.path.splitext(args.edl)[0] + '_bin.txt', vfx_ids, seed=args.seed)
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+from timecode import Timecode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Repository root
+import vfx_turnover
+from vfx_turnover import FRAME_RATES, DROP_FRAME_RATES, frames_to_tc, tc_to_frames, tc_column_to_frames, frames_column_to_tc
+
+'''
+Round-trip tests of the timecode conversions against the timecode library, scalar and vectorized column paths.
+
+'''
+
+
+def day_frames(frame_rate: str) -> int:
+    """Returns the number of frames in 24 hours at a frame rate."""
+    rate = int(round(float(frame_rate)))
+    if frame_rate in DROP_FRAME_RATES:
+        return (rate * 600 - DROP_FRAME_RATES[frame_rate] * 9) * 144
+    return rate * 86400
+
+
+def sample_frames(frame_rate: str) -> list:
+    """Returns frame counts around second, minute, ten minute and hour boundaries, up to the last frame of the day."""
+    rate = int(round(float(frame_rate)))
+    drop = DROP_FRAME_RATES.get(frame_rate, 0)
+    boundaries = [0, rate, day_frames(frame_rate) - 1]
+    for minute in range(1, 21): # Drop frame minutes, every tenth minute keeps its frame numbers
+        boundaries.append(minute * (rate * 60 - drop) + (minute // 10) * drop)
+    boundaries += [hour * day_frames(frame_rate) // 24 for hour in (1, 10, 23)]
+    frames = set()
+    for boundary in boundaries:
+        frames.update(frame for frame in range(boundary - drop - 2, boundary + drop + 3) if 0 <= frame < day_frames(frame_rate))
+    frames.update(range(0, day_frames(frame_rate), 7919)) # Spread over the day
+    return sorted(frames)
+
+
+@pytest.mark.parametrize('frame_rate', FRAME_RATES)
+def test_frames_to_tc_matches_timecode(frame_rate):
+    for frames in sample_frames(frame_rate):
+        assert frames_to_tc(frames, frame_rate) == str(Timecode(frame_rate, frames=frames + 1)) # Timecode counts from frame 1
+
+
+@pytest.mark.parametrize('frame_rate', FRAME_RATES)
+def test_tc_to_frames_round_trip(frame_rate):
+    for frames in sample_frames(frame_rate):
+        tc = str(Timecode(frame_rate, frames=frames + 1))
+        assert tc_to_frames(tc, frame_rate) == frames
+        assert frames_to_tc(tc_to_frames(tc, frame_rate), frame_rate) == tc
+
+
+@pytest.mark.parametrize('frame_rate', FRAME_RATES)
+def test_rollover_at_24_hours(frame_rate):
+    total = day_frames(frame_rate)
+    assert frames_to_tc(total, frame_rate) == frames_to_tc(0, frame_rate)
+    assert frames_to_tc(total + 125, frame_rate) == frames_to_tc(125, frame_rate)
+    assert frames_to_tc(-1, frame_rate) == frames_to_tc(total - 1, frame_rate)
+    assert frames_column_to_tc([total - 1], frame_rate, 1) == [frames_to_tc(0, frame_rate)]
+
+
+@pytest.mark.parametrize('frame_rate', FRAME_RATES)
+@pytest.mark.parametrize('min_rows', [10 ** 9, 0]) # Scalar path, then vectorized NumPy path for every column
+def test_columns_match_scalar(frame_rate, min_rows, monkeypatch):
+    monkeypatch.setattr(vfx_turnover, 'VECTORIZE_MIN_ROWS', min_rows)
+    frames = sample_frames(frame_rate)
+    tc_column = [frames_to_tc(frame, frame_rate) for frame in frames]
+    assert frames_column_to_tc(frames, frame_rate) == tc_column
+    assert tc_column_to_frames(tc_column, frame_rate) == frames
+    assert frames_column_to_tc(frames, frame_rate, -1) == [frames_to_tc(frame - 1, frame_rate) for frame in frames]
+
+
+@pytest.mark.parametrize('frame_rate', FRAME_RATES)
+def test_long_columns_vectorized(frame_rate):
+    frames = list(range(0, day_frames(frame_rate), day_frames(frame_rate) // vfx_turnover.VECTORIZE_MIN_ROWS))
+    assert len(frames) >= vfx_turnover.VECTORIZE_MIN_ROWS # Long enough for the NumPy path
+    tc_column = frames_column_to_tc(frames, frame_rate)
+    assert tc_column == [str(Timecode(frame_rate, frames=frame + 1)) for frame in frames]
+    assert tc_column_to_frames(tc_column, frame_rate) == frames
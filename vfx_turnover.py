@@ -1,52 +1,330 @@
 import re
 import json
+import csv
 import argparse
 import os
 import sys
-from timecode import Timecode
-from pandas import read_csv
+import glob
+import time
+import uuid
+from contextlib import contextmanager, ExitStack, nullcontext
+from operator import attrgetter
 
 '''
 Version 2 add handles to ALE for pulls
 
 '''
 
-def edl_to_json(edl_file: str, json_file: str):
-    """Reads an EDL file, parses it, and writes the data to a JSON file."""
-    
-    def parse_edl_line(line: str) -> dict:
-        """Parses a single line of an EDL and extracts relevant information."""
-        match = re.match(r'(\d+)\s+(\w+)\s+(\w+)\s+(\w+)\s+(\d{2}:\d{2}:\d{2}:\d{2})\s+(\d{2}:\d{2}:\d{2}:\d{2})\s+(\d{2}:\d{2}:\d{2}:\d{2})\s+(\d{2}:\d{2}:\d{2}:\d{2})?', line)   # Define regex pattern
-        if match:
-            event_num, reel, track, transition, src_start, src_end, rec_start, rec_end = match.groups() # Unpack match groups
-            return {
-                "type": "event",  # Added type indicator
-                "event_number": str(event_num), # Convert event number to string
-                "reel": reel,   # Reel number
-                "track": track, # Track number
-                "transition": transition,   # Transition type
-                "source_start_TC": src_start,   # Source start timecode
-                "source_end_TC": src_end,   # Source end timecode
-                "record_start_TC": rec_start,   # Record start timecode
-                "record_end_TC": rec_end,   # Record end timecode
-                "FROM": "",
-                "LOC": "",
-                "SOURCE": "",
-                "VFX ID": "",
-            }
+FILM_CODE='EPSV' # Define film code
+fps='24'  # Define frame rate
+handles=10  # Define handles
+consolidate_gap=None  # Frames allowed between merged pulls of the same reel, None to export one pull per event
+metrics=None  # Metrics of the run, None when not collected
+store_cut_name=None  # Cut read from a project store by the exporters, None for the latest ingested
+
+TC_PATTERN = r'\d{2}:\d{2}:\d{2}[:;]\d{2}' # Timecode pattern HH:MM:SS:FF (HH:MM:SS;FF drop frame)
+EVENT_LINE_RE = re.compile(r'^(\d+)\s+(\w+)\s+(\w+)\s+(\w+)\s+(' + TC_PATTERN + r')\s+(' + TC_PATTERN + r')\s+(' + \
+    TC_PATTERN + r')\s+(' + TC_PATTERN + r')$') # Event line: number, reel, track, transition, source in/out, record in/out
+SCENE_NUMBER_RE = re.compile(r'\d+') # Scene number in FROM CLIP NAME comment
+DROP_FRAME_RATES = {'29.97': 2, '59.94': 4} # Drop frame rates and frame numbers dropped each minute
+VERSION_RE = re.compile(r'_v(\d+)', re.IGNORECASE) # Version number in clip names, EPSV_08_015_v012_comp
+VECTORIZE_MIN_ROWS = 10000 # Timecode columns from this length are converted with NumPy
+WRITE_BUFFER_SIZE = 1 << 20 # Output file buffer size in bytes
+FRAME_RATES = ['23.976', '24', '25', '29.97', '30', '48', '50', '59.94'] # Supported frame rates
+NO_TIMER = nullcontext() # Stage timer when metrics are not collected
+WATCH_INTERVAL = 0.1 # Seconds between scans of the watch folder while files are changing
+WATCH_SETTLE = 0.5 # Seconds a file size and modification time must stay unchanged before it is processed
+WATCH_IDLE_INTERVAL = 2.0 # Seconds between scans when nothing changes and watchdog events wake the scan
+WATCH_QUEUE_SIZE = 16 # Files waiting for the watch worker
+STORE_SUFFIXES = ('.db', '.sqlite', '.sqlite3') # Project store files, read by the exporters in place of a JSON
+STORE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cuts (
+    cut_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    edl_title TEXT NOT NULL,
+    edl_fcm TEXT NOT NULL,
+    frame_rate TEXT NOT NULL,
+    max_duration INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    cut_id INTEGER NOT NULL REFERENCES cuts (cut_id),
+    position INTEGER NOT NULL,
+    event_number TEXT NOT NULL,
+    reel TEXT NOT NULL,
+    track TEXT NOT NULL,
+    transition TEXT NOT NULL,
+    source_start INTEGER NOT NULL,
+    source_end INTEGER NOT NULL,
+    record_start INTEGER NOT NULL,
+    record_end INTEGER NOT NULL,
+    from_clip TEXT NOT NULL,
+    loc TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    vfx_id TEXT NOT NULL,
+    PRIMARY KEY (cut_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_vfx_id ON events (vfx_id);
+CREATE INDEX IF NOT EXISTS events_reel_source ON events (reel, source_start, source_end);
+CREATE INDEX IF NOT EXISTS events_cut_record ON events (cut_id, record_start, record_end);
+''' # Project store tables, one row per ingested cut and per event, timecodes as frame counts.
+# max_duration (longest event of the cut, in frames) bounds the index range of overlap queries
+
+
+class Metrics:
+    """Stage timings in seconds and counters of a run, written with --metrics-json. Stages may nest."""
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    def add_time(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def count(self, counter: str, value: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def merge(self, other: dict):
+        """Adds the timings and counters of another run, as returned by to_dict."""
+        for stage, seconds in other['timings'].items():
+            self.add_time(stage, seconds)
+        for counter, value in other['counters'].items():
+            self.count(counter, value)
+
+    def to_dict(self) -> dict:
+        return {"timings": self.timings, "counters": self.counters}
+
+
+@contextmanager
+def _stage_timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(stage, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Times a stage into the metrics, a shared no-op context when metrics are not collected."""
+    return NO_TIMER if metrics is None else _stage_timer(stage)
+
+
+def timed_line(stage: str, line):
+    """Wraps a writer line function to add the time of each call to a stage."""
+    def line_timed(position: int, event: 'Event') -> str:
+        start = time.perf_counter()
+        text = line(position, event)
+        metrics.add_time(stage, time.perf_counter() - start)
+        return text
+    return line_timed
+
+
+def tc_to_frames(tc: str, frame_rate: str) -> int:
+    """Converts a HH:MM:SS:FF timecode string to a frame count starting at 0."""
+    rate = int(round(float(frame_rate))) # Nominal frame rate, 23.976 counts as 24
+    frames = ((int(tc[0:2]) * 60 + int(tc[3:5])) * 60 + int(tc[6:8])) * rate + int(tc[9:11])
+    if frame_rate in DROP_FRAME_RATES: # Remove dropped frame numbers, first two (or four) of every minute except each tenth
+        drop = DROP_FRAME_RATES[frame_rate]
+        total_minutes = int(tc[0:2]) * 60 + int(tc[3:5])
+        frames -= drop * (total_minutes - total_minutes // 10)
+    return frames
+
+
+def frames_to_tc(frames: int, frame_rate: str) -> str:
+    """Converts a frame count starting at 0 to a HH:MM:SS:FF timecode string, rolling over at 24 hours."""
+    rate = int(round(float(frame_rate))) # Nominal frame rate, 23.976 counts as 24
+    separator = ':'
+    if frame_rate in DROP_FRAME_RATES: # Add back dropped frame numbers
+        drop = DROP_FRAME_RATES[frame_rate]
+        frames_per_10_minutes = rate * 600 - drop * 9
+        frames_per_minute = rate * 60 - drop
+        frames %= frames_per_10_minutes * 144 # Roll over at 24 hours
+        tens, remainder = divmod(frames, frames_per_10_minutes)
+        frames += drop * 9 * tens
+        if remainder >= drop:
+            frames += drop * ((remainder - drop) // frames_per_minute)
+        separator = ';'
+    else:
+        frames %= rate * 86400 # Roll over at 24 hours
+    seconds, ff = divmod(frames, rate)
+    minutes, ss = divmod(seconds, 60)
+    hh, mm = divmod(minutes, 60)
+    return f"{hh:02d}:{mm:02d}:{ss:02d}{separator}{ff:02d}"
+
+
+def tc_column_to_frames(tc_column: list, frame_rate: str) -> list:
+    """Converts a column of HH:MM:SS:FF timecode strings to a list of frame counts, in one vectorized NumPy pass for long columns."""
+    if len(tc_column) < VECTORIZE_MIN_ROWS: # Short column, not worth importing NumPy
+        return [tc_to_frames(tc, frame_rate) for tc in tc_column]
+    import numpy as np # Deferred, only long columns pay the import
+
+    rate = int(round(float(frame_rate))) # Nominal frame rate, 23.976 counts as 24
+    chars = np.asarray(tc_column, dtype='U11') # Fixed width strings, one row of 11 code points per timecode
+    digits = chars.reshape(-1).view(np.uint32).reshape(-1, 11).astype(np.int64) - ord('0') # Code points to digit values
+    total_minutes = (digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 3] * 10 + digits[:, 4]
+    frames = (total_minutes * 60 + digits[:, 6] * 10 + digits[:, 7]) * rate + digits[:, 9] * 10 + digits[:, 10]
+    if frame_rate in DROP_FRAME_RATES: # Remove dropped frame numbers
+        frames -= DROP_FRAME_RATES[frame_rate] * (total_minutes - total_minutes // 10)
+    return frames.tolist()
+
+
+def frames_column_to_tc(frames_column: list, frame_rate: str, offset: int = 0) -> list:
+    """Converts a column of frame counts, offset by a number of frames, to a list of HH:MM:SS:FF timecode strings,
+    in one vectorized NumPy pass for long columns."""
+    if len(frames_column) < VECTORIZE_MIN_ROWS: # Short column, not worth importing NumPy
+        return [frames_to_tc(frames + offset, frame_rate) for frames in frames_column]
+    import numpy as np # Deferred, only long columns pay the import
+
+    rate = int(round(float(frame_rate))) # Nominal frame rate, 23.976 counts as 24
+    frames = np.fromiter(frames_column, dtype=np.int64, count=len(frames_column)) + offset
+    separator = ':'
+    if frame_rate in DROP_FRAME_RATES: # Add back dropped frame numbers
+        drop = DROP_FRAME_RATES[frame_rate]
+        frames_per_10_minutes = rate * 600 - drop * 9
+        frames_per_minute = rate * 60 - drop
+        frames = frames % (frames_per_10_minutes * 144) # Roll over at 24 hours
+        tens, remainder = np.divmod(frames, frames_per_10_minutes)
+        frames = frames + drop * 9 * tens + np.where(remainder >= drop, drop * ((remainder - drop) // frames_per_minute), 0)
+        separator = ';'
+    else:
+        frames = frames % (rate * 86400) # Roll over at 24 hours
+
+    seconds, ff = np.divmod(frames, rate)
+    minutes, ss = np.divmod(seconds, 60)
+    hh, mm = np.divmod(minutes, 60)
+    chars = np.empty((frames.size, 11), dtype=np.uint32) # One row of 11 code points per timecode
+    for column, value in ((0, hh), (3, mm), (6, ss), (9, ff)):
+        chars[:, column] = value // 10 + ord('0')
+        chars[:, column + 1] = value % 10 + ord('0')
+    chars[:, 2] = chars[:, 5] = ord(':')
+    chars[:, 8] = ord(separator)
+    return chars.view('U11').reshape(-1).tolist()
+
+
+def events_frames(events: list, attribute: str) -> list:
+    """Returns an Event frame attribute of all events."""
+    return list(map(attrgetter(attribute), events))
+
+
+def events_tc_column(events: list, attribute: str, offset: int = 0) -> list:
+    """Returns an Event frame attribute of all events as timecode strings, offset by a number of frames."""
+    return frames_column_to_tc(events_frames(events, attribute), fps, offset)
+
+
+def edl_fcm() -> str:
+    """Returns the EDL FCM line for the current frame rate."""
+    return 'FCM: DROP FRAME\n' if fps in DROP_FRAME_RATES else 'FCM: NON-DROP FRAME\n'
+
+
+class Event:
+    """EDL event with source and record timecodes stored as frame counts."""
+    __slots__ = ('event_number', 'reel', 'track', 'transition', 'source_start', 'source_end',
+                 'record_start', 'record_end', 'from_clip', 'loc', 'source_file', 'vfx_id')
+
+    def __init__(self, event_number: str, reel: str, track: str, transition: str, source_start: int, source_end: int,
+                 record_start: int, record_end: int, from_clip: str = "", loc: str = "", source_file: str = "", vfx_id: str = ""):
+        self.event_number = event_number
+        self.reel = reel
+        self.track = track
+        self.transition = transition
+        self.source_start = source_start # Frames, source in
+        self.source_end = source_end # Frames, source out (exclusive)
+        self.record_start = record_start # Frames, record in
+        self.record_end = record_end # Frames, record out (exclusive)
+        self.from_clip = from_clip # *FROM comment
+        self.loc = loc # *LOC comment (marker)
+        self.source_file = source_file # *SOURCE comment
+        self.vfx_id = vfx_id
+
+    def digest(self) -> tuple:
+        """Returns the fields that define the event outputs, equal digests mean the outputs are unchanged."""
+        return (self.vfx_id, self.reel, self.track, self.transition, self.source_start, self.source_end, self.record_start, self.record_end)
+
+    def to_dict(self, frame_rate: str) -> dict:
+        """Returns the JSON event dict, timecodes formatted as strings."""
+        return {
+            "type": "event",
+            "event_number": self.event_number,
+            "reel": self.reel,
+            "track": self.track,
+            "transition": self.transition,
+            "source_start_TC": frames_to_tc(self.source_start, frame_rate),
+            "source_end_TC": frames_to_tc(self.source_end, frame_rate),
+            "record_start_TC": frames_to_tc(self.record_start, frame_rate),
+            "record_end_TC": frames_to_tc(self.record_end, frame_rate),
+            "FROM": self.from_clip,
+            "LOC": self.loc,
+            "SOURCE": self.source_file,
+            "VFX ID": self.vfx_id,
+        }
+
+
+class Pull:
+    """Source range pulled from one reel, covering the handled ranges of one or more events."""
+    __slots__ = ('name', 'reel', 'start', 'end', 'positions')
+
+    def __init__(self, name: str, reel: str, start: int, end: int, positions: list):
+        self.name = name
+        self.reel = reel
+        self.start = start # Frames, pull in with handles
+        self.end = end # Frames, pull out with handles (exclusive)
+        self.positions = positions # Positions of the events in the pull, in source order
+
+
+def consolidate_pulls(events: list, handle_frames: int, gap: int = 0) -> list:
+    """Merges the handled source ranges of events that overlap, touch or are at most gap frames apart on the same reel.
+    Returns the pulls ordered by the position of their first event in the cut."""
+    order = sorted(range(len(events)), key=lambda position: (events[position].reel, events[position].source_start, events[position].source_end))
+    pulls = []
+    pull = None
+    for position in order: # Sort and sweep, one reel after the other
+        event = events[position]
+        start = event.source_start - handle_frames
+        end = event.source_end + handle_frames
+        if pull and pull.reel == event.reel and start <= pull.end + gap: # Overlapping or within gap, extend pull
+            pull.end = max(pull.end, end)
+            pull.positions.append(position)
         else:
-            return None
-        
-    edl_data = {
-        "edl_metadata": {
-        "edl_title": "",
-        "edl_fcm": "",
-        },
-        "events": [],  # List to hold parsed event lines
-    }
-    TITLE = ""
-    FCM = ""
+            pull = Pull('', event.reel, start, end, [position])
+            pulls.append(pull)
+
+    for pull in pulls: # Single events keep their VFX ID, merged pulls are named after their first and last VFX ID
+        first_id, last_id = events[pull.positions[0]].vfx_id, events[pull.positions[-1]].vfx_id
+        pull.name = first_id if len(pull.positions) == 1 or first_id == last_id else first_id + '-' + last_id
+    pulls.sort(key=lambda pull: min(pull.positions))
+    return pulls
+
+
+def load_events(json_file_path: str):
+    """Reads a JSON (or NDJSON) file once, or a cut of a project store, returns its metadata and the list of Events."""
+    if json_file_path.lower().endswith(STORE_SUFFIXES): # Project store, cut selected by store_cut_name
+        return load_store_events(json_file_path, store_cut_name)
+    with timed('json_load'), open(json_file_path) as input_file:
+        if json_file_path.lower().endswith('.ndjson'): # Metadata on first line, then one event per line
+            edl_metadata = json.loads(input_file.readline())['edl_metadata']
+            raw_events = [json.loads(line) for line in input_file if line.strip()]
+        else:
+            json_file = json.load(input_file) # Load JSON file
+            edl_metadata = json_file['edl_metadata']
+            raw_events = json_file['events']
+
+    with timed('timecode'):
+        columns = [tc_column_to_frames([event[key] for event in raw_events], fps) for key in \
+                   ('source_start_TC', 'source_end_TC', 'record_start_TC', 'record_end_TC')] # Parse each timecode column in one pass
+    if metrics is not None: metrics.count('events_loaded', len(raw_events))
+    events = [Event(event['event_number'], event['reel'], event['track'], event['transition'], source_start, source_end,
+                    record_start, record_end, event['FROM'], event['LOC'], event['SOURCE'], event['VFX ID'])
+              for event, source_start, source_end, record_start, record_end in zip(raw_events, *columns)]
+    return edl_metadata, events
+
+
+def iter_edl_events(edl_file: str, edl_metadata: dict = None, edl_stats: dict = None):
+    """Parses an EDL file line by line and yields each event once its comment lines are read.
+    Counts events, skipped lines and automatic VFX IDs in edl_stats, and in the metrics when enabled."""
+    event = None # Event being built, yielded when the next event starts or at end of file
     last_scene = 0
+    VFX_counter = 0
+    event_count = skipped_lines = auto_vfx_ids = 0 # Local counters, recorded once when parsing ends
 
     try:
         with open(edl_file, 'r') as f:
@@ -55,277 +333,1195 @@ def edl_to_json(edl_file: str, json_file: str):
                 if not line: # Skip empty lines
                     continue
                 elif line.startswith("TITLE:"):
-                    edl_data["edl_metadata"]["edl_title"] = line.strip("TITLE:").strip() # Strip TITLE: and spaces from line
+                    if edl_metadata is not None:
+                        edl_metadata["edl_title"] = line.strip("TITLE:").strip() # Strip TITLE: and spaces from line
+                    continue
                 elif line.startswith("FCM:"):
-                    edl_data["edl_metadata"]["edl_fcm"] = line.strip("FCM:").strip() # Strip FCM: and spaces from line
-                elif re.match(r'^\d+\s+\w+\s+\w+\s+\w+\s+(\d{2}:\d{2}:\d{2}:\d{2})+\s+(\d{2}:\d{2}:\d{2}:\d{2})+\s+(\d{2}:\d{2}:\d{2}:\d{2})+\s+(\d{2}:\d{2}:\d{2}:\d{2})$',line):
-                     parsed_line = parse_edl_line(line)
-                     if parsed_line:
-                        edl_data["events"].append(parsed_line)
-                        last_event = edl_data["events"][-1]
+                    if edl_metadata is not None:
+                        edl_metadata["edl_fcm"] = line.strip("FCM:").strip() # Strip FCM: and spaces from line
+                    continue
+
+                match = EVENT_LINE_RE.match(line) # Single regex pass per line
+                if match:
+                    if event: # Previous event is complete
+                        event_count += 1
+                        yield event
+                    event_num, reel, track, transition, src_start, src_end, rec_start, rec_end = match.groups() # Unpack match groups
+                    event = Event(event_num, reel, track, transition, tc_to_frames(src_start, fps), tc_to_frames(src_end, fps),
+                                  tc_to_frames(rec_start, fps), tc_to_frames(rec_end, fps)) # Timecodes parsed once to frames
+                elif event is None: # Comment lines before the first event
+                    print(f"Skipping unparsable line: {line}")  # Print error message
+                    skipped_lines += 1
                 elif line.startswith("*FROM"):  # Handle comment lines FROM
-                    last_event["FROM"] = line.strip("*FROM").strip() # Strip *FROM and spaces from line
+                    event.from_clip = line.strip("*FROM").strip() # Strip *FROM and spaces from line
                 elif line.startswith("*LOC:"):  # Handle comment lines LOC
-                    last_event["LOC"] = line.strip("*LOC:").strip() # Strip *LOC: and spaces from line
-                    last_event["VFX ID"] = line.strip("*LOC:").split()[-1] # Copy marker comment in VFX ID if present
+                    event.loc = line.strip("*LOC:").strip() # Strip *LOC: and spaces from line
+                    event.vfx_id = line.strip("*LOC:").split()[-1] # Copy marker comment in VFX ID if present
                 elif line.startswith("*SOURCE"):  # Handle comment lines SOURCE
-                    last_event["SOURCE"] = line.strip("*SOURCE").strip() # Strip *SOURCE and spaces from line
-                    if not last_event["LOC"]: # First edl with no markers, create VFX ID
-                        scene_clip = last_event["FROM"].strip("*FROM CLIP NAME:").strip() # Strip *FROM CLIP NAME: and spaces from line
-                        scene_clip = re.search(r'\d+', scene_clip).group().rjust(3, "0") # Select only scene number an pad to three zeros
+                    event.source_file = line.strip("*SOURCE").strip() # Strip *SOURCE and spaces from line
+                    if not event.loc: # First edl with no markers, create VFX ID
+                        scene_clip = event.from_clip.strip("*FROM CLIP NAME:").strip() # Strip *FROM CLIP NAME: and spaces from line
+                        scene_clip = SCENE_NUMBER_RE.search(scene_clip).group().rjust(3, "0") # Select only scene number an pad to three zeros
                         if scene_clip == last_scene: # Check to see if we still are in the same scene
                             VFX_counter += 10 # Add 10 to VFX counter
                         else:
                             VFX_counter = 10 # Reset VFX counter for new scene
-                        last_event["VFX ID"] = FILM_CODE + "_" + scene_clip + "_" + str(VFX_counter).rjust(3, "0") # Create VFX ID and write in json file
+                        event.vfx_id = FILM_CODE + "_" + scene_clip + "_" + str(VFX_counter).rjust(3, "0") # Create VFX ID
                         last_scene = scene_clip
+                        auto_vfx_ids += 1
                 else:
                     print(f"Skipping unparsable line: {line}")  # Print error message
+                    skipped_lines += 1
+
+        if event: # Last event of the EDL
+            event_count += 1
+            yield event
+    finally: # Also when the consumer stops early
+        if edl_stats is not None:
+            for counter, value in (('events', event_count), ('skipped_lines', skipped_lines), ('auto_vfx_ids', auto_vfx_ids)):
+                edl_stats[counter] = edl_stats.get(counter, 0) + value
+        if metrics is not None:
+            metrics.count('events_parsed', event_count)
+            metrics.count('skipped_lines', skipped_lines)
+            metrics.count('auto_vfx_ids', auto_vfx_ids)
+
+
+@contextmanager
+def atomic_write(file_path: str):
+    """Opens a buffered temporary file next to file_path, renamed over file_path only if writing succeeds."""
+    temp_file_path = file_path + '.' + uuid.uuid4().hex[:8] + '.tmp' # Same directory, so the rename is atomic
+    try:
+        with open(temp_file_path, 'x', buffering=WRITE_BUFFER_SIZE) as output_file:
+            yield output_file
+        os.replace(temp_file_path, file_path) # Replace previous file in one step
+    except BaseException:
+        if os.path.exists(temp_file_path): os.remove(temp_file_path) # Leave previous file untouched
+        raise
 
-    except FileNotFoundError:
-        print(f"Error: EDL file not found: {edl_file}") # Print error message
-        return
 
-    try:        
-        with open(json_file, 'w') as outfile: # Open JSON file
-            json.dump(edl_data, outfile, indent=4) # Write data to JSON file
+def json_heading(edl_metadata: dict) -> str:
+    """Returns the start of a JSON file laid out like json.dump(indent=4), up to the events list."""
+    return '{\n    "edl_metadata": ' + json.dumps(edl_metadata, indent=4).replace('\n', '\n    ') + ',\n'
+
+
+def json_event(event: Event) -> str:
+    """Returns an event indented inside the events list of a JSON file."""
+    return '        ' + json.dumps(event.to_dict(fps), indent=4).replace('\n', '\n        ')
+
+
+def write_events_json(edl_metadata: dict, events, json_file: str) -> int:
+    """Streams events to a JSON file laid out like json.dump(indent=4), returns the number of events written."""
+    events = iter(events)
+    event = next(events, None) # Read up to the first event so TITLE and FCM are in edl_metadata
+    count = 0
+
+    with atomic_write(json_file) as outfile: # Open JSON file
+        outfile.write(json_heading(edl_metadata)) # Write metadata
+        if event is None:
+            outfile.write('    "events": []\n}') # No events in EDL
+            return count
+        outfile.write('    "events": [\n')
+        while event is not None:
+            if count:
+                outfile.write(',\n') # Separate events
+            outfile.write(json_event(event)) # Write event
+            count += 1
+            event = next(events, None)
+        outfile.write('\n    ]\n}')
+    return count
+
+
+def write_events_ndjson(edl_metadata: dict, events, ndjson_file: str) -> int:
+    """Streams events to a NDJSON file, metadata on the first line then one event per line."""
+    events = iter(events)
+    event = next(events, None) # Read up to the first event so TITLE and FCM are in edl_metadata
+    count = 0
+
+    with atomic_write(ndjson_file) as outfile: # Open NDJSON file
+        outfile.write(json.dumps({"edl_metadata": edl_metadata}) + '\n') # Write metadata line
+        while event is not None:
+            outfile.write(json.dumps(event.to_dict(fps)) + '\n') # Write event line
+            count += 1
+            event = next(events, None)
+    return count
+
+
+def edl_to_json(edl_file: str, json_file: str, ndjson: bool = False):
+    """Reads an EDL file, parses it, and streams the events to a JSON (or NDJSON) file."""
+    edl_metadata = {
+        "edl_title": "",
+        "edl_fcm": "",
+    }
+    write_events = write_events_ndjson if ndjson else write_events_json # Select output format
+
+    try:
+        with timed('parse_and_write_json'):
+            write_events(edl_metadata, iter_edl_events(edl_file, edl_metadata), json_file) # Parse and write in one pass
         print(f"Successfully converted {edl_file} to {json_file}")  # Print success message
+    except FileNotFoundError:
+        print(f"Error: EDL file not found: {edl_file}") # Print error message
     except Exception as e:
         print(f"Error writing JSON file: {e}")  # Print error message
 
 
-def json_to_markers(json_file_path: str, markers_file_path: str):
-    """Reads a JSON file and export a markers file for AVID."""
+class EventColumns:
+    """Timecode columns of a list of events, each formatted once and shared by all writers."""
+
+    def __init__(self, events: list):
+        self.events = events
+        self._columns = {} # (attribute, offset) -> timecode strings
+
+    def tc(self, attribute: str, offset: int = 0) -> list:
+        """Returns an Event frame attribute of all events as timecode strings, offset by a number of frames."""
+        key = (attribute, offset)
+        if key not in self._columns:
+            with timed('timecode'):
+                self._columns[key] = events_tc_column(self.events, attribute, offset)
+        return self._columns[key]
+
+    def edl_timecodes(self) -> list:
+        """Returns the source and record timecodes of each event joined as they appear in an EDL line."""
+        if 'edl' not in self._columns:
+            self._columns['edl'] = [' '.join(timecodes) for timecodes in zip(self.tc('source_start'), self.tc('source_end'),
+                                                                             self.tc('record_start'), self.tc('record_end'))]
+        return self._columns['edl']
+
+    def pulls(self) -> list:
+        """Returns the events consolidated into pulls with handles, using consolidate_gap (one pull per event if None)."""
+        if 'pulls' not in self._columns:
+            with timed('pull_consolidation'):
+                self._columns['pulls'] = consolidate_pulls(self.events, handles + 1, consolidate_gap or 0) if consolidate_gap is not None else \
+                    [Pull(event.vfx_id, event.reel, event.source_start - handles - 1, event.source_end + handles + 1, [position])
+                     for position, event in enumerate(self.events)]
+        return self._columns['pulls']
+
+
+def edl_event_line(event: Event, name: str, timecodes: str) -> str:
+    """Returns an EDL event line for an event, using name in place of the reel."""
+    return event.event_number + ' ' + name + ' ' + event.track + ' ' + event.transition + ' ' + timecodes
+
+
+def edl_heading(edl_file_path: str) -> str:
+    """Returns the TITLE and FCM lines of an exported EDL."""
+    return 'TITLE: ' + os.path.splitext(edl_file_path)[0] + '\n' + edl_fcm()
+
+
+def json_writer(edl_metadata: dict, columns: EventColumns, file_path: str):
+    """JSON file of the parsed EDL."""
+    if not columns.events:
+        return json_heading(edl_metadata) + '    "events": []\n}', None, '' # No events in EDL
+
+    def line(position: int, event: Event) -> str:
+        return (',\n' if position else '') + json_event(event) # Separate events
+    return json_heading(edl_metadata) + '    "events": [\n', line, '\n    ]\n}'
+
+
+def markers_writer(edl_metadata: dict, columns: EventColumns, file_path: str):
+    """Markers file for AVID."""
     user = 'enzo_0624' # Define AVID user name
     track_number = 'V1' # Define track number
     marker_color = 'green' # Define AVID marker color
+    record_start_column = columns.tc('record_start')
 
-    with open(json_file_path) as input_file:
-        json_file = json.load(input_file) # Load JSON file
+    def line(position: int, event: Event) -> str:
+        return user + '\t' + record_start_column[position] + '\t' + track_number + '\t' + marker_color + '\t' + \
+        event.vfx_id + '\t' + '1' + '\n' # Define markers file line
+    return '', line, ''
 
-    if os.path.exists(markers_file_path): os.remove(markers_file_path) # Remove file if it exists
-    try:
-        with open(markers_file_path, 'a') as output_file: # Open markers file
-            for i in range(len(json_file['events'])): # Loop through JSON file
-                markers_file_line = user + '\t' + json_file['events'][i]['record_start_TC'] + '\t' + track_number + '\t' + marker_color + '\t' + \
-                json_file['events'][i]['VFX ID'] + '\t' + '1' + '\n' # Define markers file line
-                output_file.write(markers_file_line) # Write line to markers file
-        print(f"Succesfully exported markers file: {markers_file_path}")    # Print success message
-    except Exception as e:
-        print(f"Error writing {markers_file_path}: {e}")    # Print error message
 
+def subcaps_writer(edl_metadata: dict, columns: EventColumns, file_path: str):
+    """Subcap file for AVID."""
+    record_start_column = columns.tc('record_start')
+    record_end_column = columns.tc('record_end')
 
-def json_to_subcaps(json_file_path: str, sub_file_path: str):
-    """Reads a JSON file and export a subcap file for AVID."""
-    
-    with open(json_file_path) as input_file:
-        json_file = json.load(input_file) # Load JSON file
-
-    if os.path.exists(sub_file_path): os.remove(sub_file_path) # Remove file if it exists
-    try:
-        with open(sub_file_path, 'a') as output_file:
-            sub_file_line = '<begin subtitles>\n' # Define start of subcaps file
-            output_file.write(sub_file_line)
-            for i in range(len(json_file['events'])): # Loop through JSON file
-                sub_file_line = json_file['events'][i]['record_start_TC'] + ' ' + json_file['events'][i]['record_end_TC'] + '\n' # Define subcaps file line
-                output_file.write(sub_file_line) # Write line to subcaps file
-                sub_file_line = json_file['events'][i]['VFX ID'] + '\n' # Define subcaps file line
-                output_file.write(sub_file_line + '\n') # Write line to subcaps file
-            sub_file_line = '<end subtitles>\n' # Define end of subcaps file
-            output_file.write(sub_file_line) # Write line to subcaps file
-        print(f"Succesfully exported subcaps file: {sub_file_path}")    # Print success message
-    except Exception as e:
-        print(f"Error writing {sub_file_path}: {e}")    # Print error message
+    def line(position: int, event: Event) -> str:
+        return record_start_column[position] + ' ' + record_end_column[position] + '\n' + event.vfx_id + '\n\n' # Define subcaps file lines
+    return '<begin subtitles>\n', line, '<end subtitles>\n' # Define start and end of subcaps file
 
 
-def export_ale_pulls(json_file_path: str, ale_pulls_file_path: str):
-    """Export an ALE for creating pulls in AVID. 24 fps"""
+def ale_pulls_writer(edl_metadata: dict, columns: EventColumns, file_path: str):
+    """ALE for creating pulls in AVID."""
     heading = 'Heading\n\
 FIELD_DELIM' + '\t' +'TABS\n\
 VIDEO_FORMAT' + '\t' + '1080\n\
 AUDIO_FORMAT' + '\t' + '48khz\n\
-FPS' + '\t' + '24\n\
+FPS' + '\t' + fps + '\n\
 \n\
 Column\n\
 Name' + '\t' + 'Tracks' + '\t' + 'Start' + '\t' + 'End' + '\t' + 'Tape\n\
 Data\n\
 \n' # Define ALE heading
 
-    handles_TC = Timecode(fps, '00:00:00:' + str(handles))
-    with open(json_file_path) as input_file:
-        json_file = json.load(input_file) # Load JSON file
-    
-    if os.path.exists(ale_pulls_file_path): os.remove(ale_pulls_file_path) # Remove file if it exists
+    handle_frames = handles + 1 # Pulls have always been handles + 1 frames each side (Timecode objects count from frame 1)
+    if consolidate_gap is not None: # One line per consolidated pull, written at the first event of the pull
+        pulls_by_position = {min(pull.positions): pull for pull in columns.pulls()}
+
+        def line(position: int, event: Event) -> str:
+            pull = pulls_by_position.get(position)
+            return pull.name + '\t' + 'V' + '\t' + frames_to_tc(pull.start, fps) + '\t' + frames_to_tc(pull.end, fps) + \
+            '\t' + pull.reel + '\n' if pull else '' # Define ALE file line
+        return heading, line, ''
+
+    new_source_start_column = columns.tc('source_start', -handle_frames) # Define new source start timecodes with handles
+    new_source_end_column = columns.tc('source_end', handle_frames) # Define new source end timecodes with handles
+
+    def line(position: int, event: Event) -> str:
+        return event.vfx_id + '\t' + 'V' + '\t' + new_source_start_column[position] + '\t' + new_source_end_column[position] + \
+        '\t' + event.reel + '\n' # Define ALE file line
+    return heading, line, ''
+
+
+def pulls_map_writer(edl_metadata: dict, columns: EventColumns, file_path: str):
+    """TAB mapping table from each pull to the VFX IDs it contains."""
+    heading = 'Pull' + '\t' + 'Tape' + '\t' + 'Pull Start' + '\t' + 'Pull End' + '\t' + 'VFX ID' + '\t' + 'Start' + '\t' + 'End' # Define TAB heading
+    pulls_by_position = {min(pull.positions): pull for pull in columns.pulls()}
+    events = columns.events
+
+    def line(position: int, event: Event) -> str:
+        pull = pulls_by_position.get(position)
+        if not pull:
+            return ''
+        pull_columns = pull.name + '\t' + pull.reel + '\t' + frames_to_tc(pull.start, fps) + '\t' + frames_to_tc(pull.end, fps) + '\t'
+        return ''.join(pull_columns + events[event_position].vfx_id + '\t' + frames_to_tc(events[event_position].source_start, fps) + '\t' + \
+                       frames_to_tc(events[event_position].source_end, fps) + '\n' for event_position in pull.positions) # One line per VFX ID
+    return heading + '\n', line, ''
+
+
+def vfx_edl_writer(edl_metadata: dict, columns: EventColumns, file_path: str):
+    """EDL of the events named by VFX ID, for cutting in pulls or as a dummy EDL in AVID."""
+    timecodes_column = columns.edl_timecodes()
+
+    def line(position: int, event: Event) -> str:
+        return edl_event_line(event, event.vfx_id, timecodes_column[position]) + '\n' # Define EDL file line
+    return edl_heading(file_path), line, ''
+
+
+def google_tab_writer(edl_metadata: dict, columns: EventColumns, file_path: str):
+    """TAB file to import into a Spreadsheet."""
+    heading = '#' + '\t' + 'Name' + '\t' + 'Frame' + '\t' + 'Comments' + '\t' + 'Status' + '\t' + 'Date' + '\t' + 'Duration' + '\t' + 'Start' + '\t' +\
+    'End' + '\t' + 'Frame Count Duration' + '\t' + 'Tape'   # Define TAB heading
+    number_of_frames_column = [event.source_end - event.source_start for event in columns.events]  # Define number of frames
+    with timed('timecode'):
+        duration_column = frames_column_to_tc(number_of_frames_column, fps, -1)    # Define durations, displayed as the last frame like Timecode objects do
+    start_column = columns.tc('source_start')
+    end_column = columns.tc('source_end')
+
+    def line(position: int, event: Event) -> str:
+        return str(position + 1) + '\t' +  event.vfx_id + '\t' + '\t' + '\t' + '\t' + '\t' + duration_column[position] + '\t' + start_column[position] + '\t' +\
+        end_column[position] + '\t' + str(number_of_frames_column[position]) + '\t' + event.reel + '\n'  # Define TAB file line
+    return heading + '\n', line, ''
+
+
+OUTPUTS = { # Output name: (suffix added to the EDL or JSON file name, writer, description)
+    'json': ('.json', json_writer, 'JSON file'),
+    'markers': ('_markers.txt', markers_writer, 'markers file'),
+    'subcaps': ('_subcaps.txt', subcaps_writer, 'subcaps file'),
+    'pulls': ('.ALE', ale_pulls_writer, 'ALE file'),
+    'pulls_map': ('_pulls_map.txt', pulls_map_writer, 'pulls map file'),
+    'edl_pulls': ('_pulls.edl', vfx_edl_writer, 'EDL file'),
+    'dummy_edl': ('_dummy.edl', vfx_edl_writer, 'EDL file'),
+    'google': ('_TAB.txt', google_tab_writer, 'TAB file'),
+}
+DEFAULT_OUTPUTS = [name for name in OUTPUTS if name != 'pulls_map'] # The pulls map is added when consolidating pulls
+OUTPUT_SUFFIXES = tuple(OUTPUTS[name][0].lower() for name in OUTPUTS) + ('_vfx_final.edl', '_unmatched.txt', '_changes.txt') # Files written by this script, never taken as input cuts or bins
+
+
+def write_outputs(edl_metadata: dict, events: list, output_paths: dict, errors: list = None) -> bool:
+    """Writes the requested outputs (output name: file path) in a single pass over the events, each file atomically.
+    Error messages are also appended to errors if given."""
+    columns = EventColumns(events) # Timecode columns shared by all writers
     try:
-        with open(ale_pulls_file_path, 'a') as output_file:
-            output_file.write(heading) # Write heading to ALE file
-            for i in range(len(json_file['events'])):
-                new_source_start_TC = Timecode(fps, json_file['events'][i]['source_start_TC']) - handles_TC # Define new source start timecode with handles
-                new_source_end_TC = Timecode(fps, json_file['events'][i]['source_end_TC']) + handles_TC # Define new source end timecode with handles
-                sub_file_line = json_file['events'][i]['VFX ID'] + '\t' + 'V' + '\t' + str(new_source_start_TC) + '\t' + str(new_source_end_TC) + \
-                '\t' + json_file['events'][i]['reel'] + '\n' # Define ALE file line
-                output_file.write(sub_file_line) # Write line to ALE file
-            print(f"Succesfully exported ALE file: {ale_pulls_file_path}")  # Print success message
+        with timed('write_outputs'):
+            writers = []
+            for name, file_path in output_paths.items():
+                with timed('write:' + name): # Writer setup, formats the columns it needs
+                    heading, line, footer = OUTPUTS[name][1](edl_metadata, columns, file_path)
+                if metrics is not None and line:
+                    line = timed_line('write:' + name, line) # Time each line, only when collecting metrics
+                writers.append((heading, line, footer))
+            with ExitStack() as stack: # Temporary files are renamed together at the end, or all removed on error
+                output_files = [stack.enter_context(atomic_write(file_path)) for file_path in output_paths.values()]
+                for output_file, (heading, line, footer) in zip(output_files, writers):
+                    output_file.write(heading) # Write headings
+                lines = [(output_file.write, line) for output_file, (heading, line, footer) in zip(output_files, writers) if line]
+                for position, event in enumerate(events): # Single pass over the events
+                    for write, line in lines:
+                        write(line(position, event))
+                for output_file, (heading, line, footer) in zip(output_files, writers):
+                    output_file.write(footer) # Write footers
     except Exception as e:  # Catch exception
-        print(f"Error writing {ale_pulls_file_path}: {e}")      # Print error message
+        print(f"Error writing {', '.join(output_paths.values())}: {e}")  # Print error message
+        if errors is not None: errors.append(f"Error writing {', '.join(output_paths.values())}: {e}")
+        return False
 
+    for name, file_path in output_paths.items():
+        print(f"Succesfully exported {OUTPUTS[name][2]}: {file_path}")  # Print success message
+    return True
 
-def export_pulls_edl(json_file_path: str, edl_pulls_file_path: str):
-    """Export an EDL for cutting in pulls in AVID."""
-    with open(json_file_path) as input_file:
-        json_file = json.load(input_file) # Load JSON file
-    
-    if os.path.exists(edl_pulls_file_path): os.remove(edl_pulls_file_path) # Remove file if it exists
+
+def turnover(edl_file: str, outputs: list, edl_stats: dict = None, errors: list = None):
+    """Parses an EDL once and writes the requested outputs next to it, returns the metadata and events."""
+    edl_metadata = {
+        "edl_title": "",
+        "edl_fcm": "",
+    }
     try:
-        with open(edl_pulls_file_path, 'a') as output_file: # Open EDL file
-            heading = 'TITLE: ' + os.path.splitext(edl_pulls_file_path)[0]+ '\n'\
-            'FCM: NON-DROP FRAME\n' # Define EDL heading
-            output_file.write(heading) # Write heading to EDL file
-            for i in range(len(json_file['events'])): # Loop through JSON file
-                edl_pulls_file_line = json_file['events'][i]['event_number'] + ' ' + json_file['events'][i]['VFX ID'] + ' ' + json_file['events'][i]['track'] + ' ' + \
-                json_file['events'][i]['transition'] + ' ' + json_file['events'][i]['source_start_TC'] + ' ' + json_file['events'][i]['source_end_TC'] + ' ' + \
-                json_file['events'][i]['record_start_TC'] + ' ' + json_file['events'][i]['record_end_TC'] # Define EDL file line
-                output_file.write(edl_pulls_file_line + '\n') # Write line to EDL file
-            print(f"Succesfully exported EDL file: {edl_pulls_file_path}")  # Print success message
-    except Exception as e:  # Catch exception
-        print(f"Error writing {edl_pulls_file_path}: {e}")  # Print error message
+        with timed('parse'):
+            events = list(iter_edl_events(edl_file, edl_metadata, edl_stats)) # Parse EDL once, events stay in memory
+    except FileNotFoundError:
+        print(f"Error: EDL file not found: {edl_file}") # Print error message
+        if errors is not None: errors.append(f"EDL file not found: {edl_file}")
+        return None
 
+    edl_filename = os.path.splitext(edl_file)[0] # Remove extension from EDL file
+    write_outputs(edl_metadata, events, {name: edl_filename + OUTPUTS[name][0] for name in outputs}, errors)
+    return edl_metadata, events
 
-def export_dummy_edl(json_file_path: str, dummy_edl_file_path: str):
-    """Export a Dummy EDL of VFX in AVID."""
-    with open(json_file_path) as input_file: # Open JSON file
-        json_file = json.load(input_file)   # Load JSON file
-    if os.path.exists(dummy_edl_file_path): os.remove(dummy_edl_file_path)      # Remove file if it exists
 
+def set_settings(film_code: str, frame_rate: str, handle_frames: int, gap: int = None, collect_metrics: bool = False):
+    """Sets film code, frame rate, handles, pull consolidation gap and metrics collection, also in batch worker processes."""
+    global FILM_CODE, fps, handles, consolidate_gap, metrics
+    FILM_CODE, fps, handles, consolidate_gap = film_code, frame_rate, handle_frames, gap
+    metrics = Metrics() if collect_metrics else None
+
+
+def batch_turnover_edl(edl_file: str, outputs: list) -> dict:
+    """Runs a turnover of one EDL, returns its summary: event count, skipped lines, errors and metrics when collected."""
+    global metrics
+    edl_stats = {'skipped_lines': 0}
+    errors = []
+    if metrics is not None:
+        metrics = Metrics() # Metrics of this EDL only, merged by batch_turnover
+    try:
+        parsed = turnover(edl_file, outputs, edl_stats, errors)
+    except Exception as e: # Keep the batch going, report the error in the summary
+        print(f"Error processing {edl_file}: {e}") # Print error message
+        errors.append(f"{type(e).__name__}: {e}")
+        parsed = None
+    summary = {
+        "edl": edl_file,
+        "events": len(parsed[1]) if parsed else 0,
+        "skipped_lines": edl_stats['skipped_lines'],
+        "errors": errors,
+    }
+    if metrics is not None:
+        summary['metrics'] = metrics.to_dict()
+    return summary
+
+
+def batch_edl_files(edl_input: str) -> list:
+    """Returns the EDL files of a directory, or the files matching a glob pattern, sorted by path. EDLs written by this script are left out."""
+    if os.path.isdir(edl_input):
+        edl_files = [os.path.join(edl_input, name) for name in os.listdir(edl_input) if name.lower().endswith('.edl')]
+    else:
+        edl_files = glob.glob(edl_input)
+    return sorted(edl_file for edl_file in edl_files if not os.path.basename(edl_file).lower().endswith(OUTPUT_SUFFIXES))
+
+
+def batch_turnover(edl_input: str, outputs: list, workers: int = None, summary_file_path: str = None) -> list:
+    """Runs a turnover of every EDL of a directory or glob pattern across worker processes, returns the summaries in path order."""
+    edl_files = batch_edl_files(edl_input)
+    if not edl_files:
+        print(f"Error: no EDL files found: {edl_input}") # Print error message
+        return []
+
+    global metrics
+    run_metrics = metrics # Metrics of the whole batch, swapped out per EDL
+    workers = min(workers or os.cpu_count() or 1, len(edl_files)) # No more workers than EDLs
+    if workers == 1:
+        summaries = [batch_turnover_edl(edl_file, outputs) for edl_file in edl_files]
+    else:
+        from concurrent.futures import ProcessPoolExecutor # Deferred, only batch mode needs it
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_settings,
+                                 initargs=(FILM_CODE, fps, handles, consolidate_gap, metrics is not None)) as executor:
+            summaries = list(executor.map(batch_turnover_edl, edl_files, [outputs] * len(edl_files))) # Results keep the order of edl_files
+    metrics = run_metrics
+    if metrics is not None: # Add up the metrics of every EDL
+        for summary in summaries:
+            metrics.merge(summary['metrics'])
+
+    for summary in summaries: # Print consolidated summary
+        status = 'OK' if not summary['errors'] else '; '.join(summary['errors'])
+        print(f"{summary['edl']}\t{summary['events']} events\t{summary['skipped_lines']} skipped lines\t{status}")
+    print(f"Processed {len(summaries)} EDL files, {sum(summary['events'] for summary in summaries)} events, "
+          f"{sum(1 for summary in summaries if summary['errors'])} with errors")
+
+    if summary_file_path:
+        try:
+            with atomic_write(summary_file_path) as output_file:
+                json.dump(summaries, output_file, indent=4) # Write summary to JSON file
+            print(f"Succesfully exported summary file: {summary_file_path}")  # Print success message
+        except Exception as e:  # Catch exception
+            print(f"Error writing {summary_file_path}: {e}")  # Print error message
+    return summaries
+
+
+def open_store(db_file_path: str):
+    """Opens (or creates) a SQLite project store and its schema, returns the connection."""
+    import sqlite3 # Deferred, only the project store needs it
+    connection = sqlite3.connect(db_file_path)
+    connection.executescript(STORE_SCHEMA)
+    return connection
+
+
+def store_cut(connection, cut_name: str = None) -> tuple:
+    """Returns the cut id, name, title, FCM, frame rate and longest event of a cut of the store, the latest ingested if cut_name is None."""
+    if cut_name is None:
+        row = connection.execute('SELECT cut_id, name, edl_title, edl_fcm, frame_rate, max_duration FROM cuts ORDER BY cut_id DESC LIMIT 1').fetchone()
+    else:
+        row = connection.execute('SELECT cut_id, name, edl_title, edl_fcm, frame_rate, max_duration FROM cuts WHERE name = ?', (cut_name,)).fetchone()
+    if row is None:
+        raise ValueError(f"cut not found in project store: {cut_name or 'no cuts ingested'}")
+    return row
+
+
+def ingest_events(connection, cut_name: str, edl_metadata: dict, events: list) -> int:
+    """Stores the events of a cut, replacing a previous ingest of the same cut, returns the number of events stored."""
+    with connection: # One transaction
+        connection.execute('DELETE FROM events WHERE cut_id IN (SELECT cut_id FROM cuts WHERE name = ?)', (cut_name,))
+        connection.execute('DELETE FROM cuts WHERE name = ?', (cut_name,))
+        max_duration = max((max(event.source_end - event.source_start, event.record_end - event.record_start) for event in events), default=0)
+        cut_id = connection.execute('INSERT INTO cuts (name, edl_title, edl_fcm, frame_rate, max_duration, ingested_at) VALUES (?, ?, ?, ?, ?, ?)',
+                                    (cut_name, edl_metadata.get('edl_title', ''), edl_metadata.get('edl_fcm', ''), fps, max_duration,
+                                     time.strftime('%Y-%m-%dT%H:%M:%S'))).lastrowid
+        connection.executemany('INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                               ((cut_id, position, event.event_number, event.reel, event.track, event.transition, event.source_start,
+                                 event.source_end, event.record_start, event.record_end, event.from_clip, event.loc, event.source_file,
+                                 event.vfx_id) for position, event in enumerate(events)))
+    return len(events)
+
+
+def store_ingest(db_file_path: str, input_path: str):
+    """Ingests an EDL or JSON file, or every EDL of a directory or glob pattern, into the project store. Each file is a cut named after it."""
+    input_files = batch_edl_files(input_path) if os.path.isdir(input_path) or glob.has_magic(input_path) else [input_path]
+    if not input_files:
+        print(f"Error: no EDL files found: {input_path}") # Print error message
+        return
+    connection = open_store(db_file_path)
+    try:
+        for input_file in input_files:
+            cut_name = os.path.splitext(os.path.basename(input_file))[0] # Cut named after its file
+            try:
+                if input_file.lower().endswith('.edl'):
+                    edl_metadata = {
+                        "edl_title": "",
+                        "edl_fcm": "",
+                    }
+                    with timed('parse'):
+                        events = list(iter_edl_events(input_file, edl_metadata))
+                else:
+                    edl_metadata, events = load_events(input_file) # Load JSON file
+                with timed('store_ingest'):
+                    count = ingest_events(connection, cut_name, edl_metadata, events)
+                print(f"Succesfully ingested {count} events of {cut_name}: {db_file_path}")  # Print success message
+            except FileNotFoundError:
+                print(f"Error: file not found: {input_file}") # Print error message
+            except Exception as e:  # Catch exception
+                print(f"Error ingesting {input_file}: {e}")  # Print error message
+    finally:
+        connection.close()
+
+
+def store_ingest_events(db_file_path: str, edl_file: str, edl_metadata: dict, events: list):
+    """Ingests the events of an EDL already parsed into the project store, as a cut named after the EDL."""
+    cut_name = os.path.splitext(os.path.basename(edl_file))[0] # Cut named after its EDL
     try:
-        with open(dummy_edl_file_path, 'a') as output_file: # Open EDL file
-            heading = 'TITLE: ' + os.path.splitext(dummy_edl_file_path)[0]+ '\n'\
-            'FCM: NON-DROP FRAME\n'     # Define EDL heading
-            output_file.write(heading)  # Write heading to EDL file
-            for i in range(len(json_file['events'])):   # Loop through JSON file
-                dummy_edl_file_line = json_file['events'][i]['event_number'] + ' ' + json_file['events'][i]['VFX ID'] + ' ' + json_file['events'][i]['track'] + ' ' + \
-                json_file['events'][i]['transition'] + ' ' + json_file['events'][i]['source_start_TC'] + ' ' + json_file['events'][i]['source_end_TC'] + ' ' + \
-                json_file['events'][i]['record_start_TC'] + ' ' + json_file['events'][i]['record_end_TC']   # Define EDL file line
-                output_file.write(dummy_edl_file_line + '\n')   # Write line to EDL file
-            print(f"Succesfully exported EDL file: {dummy_edl_file_path}")  # Print success message
+        connection = open_store(db_file_path)
+        try:
+            with timed('store_ingest'):
+                count = ingest_events(connection, cut_name, edl_metadata, events)
+            print(f"Succesfully ingested {count} events of {cut_name}: {db_file_path}")  # Print success message
+        finally:
+            connection.close()
     except Exception as e:  # Catch exception
-        print(f"Error writing {dummy_edl_file_path}: {e}")      # Print error message
+        print(f"Error ingesting {edl_file}: {e}")  # Print error message
+
+
+def load_store_events(db_file_path: str, cut_name: str = None):
+    """Reads a cut of the project store, the latest ingested if cut_name is None. Returns its metadata and the list of Events like load_events."""
+    if not os.path.exists(db_file_path): # sqlite3 would create an empty store
+        raise FileNotFoundError(f"project store not found: {db_file_path}")
+    connection = open_store(db_file_path)
+    try:
+        with timed('store_load'):
+            cut_id, name, edl_title, edl_fcm, frame_rate, max_duration = store_cut(connection, cut_name)
+            rows = connection.execute('SELECT event_number, reel, track, transition, source_start, source_end, record_start, record_end, '
+                                      'from_clip, loc, source_file, vfx_id FROM events WHERE cut_id = ? ORDER BY position', (cut_id,)).fetchall()
+    finally:
+        connection.close()
+
+    if frame_rate != fps: # Frame counts of another rate, convert through timecodes
+        with timed('timecode'):
+            rows = [row[:4] + tuple(tc_to_frames(frames_to_tc(frames, frame_rate), fps) for frames in row[4:8]) + row[8:] for row in rows]
+    if metrics is not None: metrics.count('events_loaded', len(rows))
+    return {"edl_title": edl_title, "edl_fcm": edl_fcm}, [Event(*row) for row in rows]
+
+
+def input_filename(input_file_path: str) -> str:
+    """Returns the path outputs are named after: the input file without extension, or the cut next to its project store."""
+    if not input_file_path.lower().endswith(STORE_SUFFIXES):
+        return os.path.splitext(input_file_path)[0] # Remove extension from input file
+    if not os.path.exists(input_file_path):
+        return os.path.splitext(input_file_path)[0] # Missing store, reported when loading
+    connection = open_store(input_file_path)
+    try:
+        name = store_cut(connection, store_cut_name)[1]
+    except ValueError: # Missing cut, reported when loading
+        name = os.path.splitext(os.path.basename(input_file_path))[0]
+    finally:
+        connection.close()
+    return os.path.join(os.path.dirname(input_file_path), name)
+
+
+def query_store(db_file_path: str, vfx_id: str = None, reel: str = None, tc_range: list = None) -> list:
+    """Prints and returns the events of the project store matching a query, as TAB delimited rows with their cut:
+    the history of a VFX ID across cuts, the shots using a camera file (reel), optionally only those whose source overlaps tc_range,
+    or the shots whose record overlaps tc_range in a cut (store_cut_name, or the latest). tc_range is a START and END timecode, both included,
+    converted to frames at the frame rate of each cut."""
+    if not os.path.exists(db_file_path):
+        print(f"Error: project store not found: {db_file_path}") # Print error message
+        return []
+    def range_frames(frame_rate: str) -> tuple:
+        return tc_to_frames(tc_range[0], frame_rate), tc_to_frames(tc_range[1], frame_rate) + 1 # END frame included
+
+    fields = 'cuts.name, cuts.frame_rate, event_number, vfx_id, reel, source_start, source_end, record_start, record_end FROM events JOIN cuts USING (cut_id) '
+    columns = 'SELECT ' + fields
+    connection = open_store(db_file_path)
+    try:
+        with timed('store_query'):
+            if vfx_id:
+                rows = connection.execute(columns + 'WHERE vfx_id = ? ORDER BY cut_id, position', (vfx_id,)).fetchall()
+            elif reel and tc_range: # Frame counts differ between rates, one query per frame rate of the store
+                rows = []
+                for frame_rate, max_duration in connection.execute('SELECT frame_rate, MAX(max_duration) FROM cuts GROUP BY frame_rate').fetchall():
+                    start, end = range_frames(frame_rate) # Events starting more than the longest event before START can not overlap
+                    rows += connection.execute('SELECT cut_id, position, ' + fields + 'WHERE reel = ? AND frame_rate = ? AND '
+                                               'source_start BETWEEN ? AND ? AND source_end > ?', (reel, frame_rate, start - max_duration, end - 1, start)).fetchall()
+                rows = [row[2:] for row in sorted(rows, key=lambda row: row[:2])] # Cut order, then event order
+            elif reel:
+                rows = connection.execute(columns + 'WHERE reel = ? ORDER BY cut_id, position', (reel,)).fetchall()
+            else:
+                cut = store_cut(connection, store_cut_name)
+                start, end = range_frames(cut[4]) # Events starting more than the longest event before START can not overlap
+                rows = connection.execute(columns + 'WHERE cut_id = ? AND record_start BETWEEN ? AND ? AND record_end > ? ORDER BY record_start, position',
+                                          (cut[0], start - cut[5], end - 1, start)).fetchall()
+    except ValueError as e: # Missing cut
+        print(f"Error: {e}") # Print error message
+        return []
+    finally:
+        connection.close()
+
+    heading = 'Cut' + '\t' + 'Event' + '\t' + 'VFX ID' + '\t' + 'Tape' + '\t' + 'Source Start' + '\t' + 'Source End' + '\t' + \
+    'Record Start' + '\t' + 'Record End' # Define query result heading
+    lines = ['\t'.join([cut_name, event_number, row_vfx_id, row_reel] + [frames_to_tc(frames, frame_rate) for frames in timecodes])
+             for cut_name, frame_rate, event_number, row_vfx_id, row_reel, *timecodes in rows]
+    print(heading)
+    for line in lines:
+        print(line)
+    print(f"{len(lines)} events found")
+    return lines
+
+
+def json_to_markers(json_file_path: str, markers_file_path: str):
+    """Reads a JSON file and export a markers file for AVID."""
+    edl_metadata, events = load_events(json_file_path) # Load JSON file
+    write_outputs(edl_metadata, events, {'markers': markers_file_path})
+
+
+def json_to_subcaps(json_file_path: str, sub_file_path: str):
+    """Reads a JSON file and export a subcap file for AVID."""
+    edl_metadata, events = load_events(json_file_path) # Load JSON file
+    write_outputs(edl_metadata, events, {'subcaps': sub_file_path})
+
+
+def export_ale_pulls(json_file_path: str, ale_pulls_file_path: str):
+    """Export an ALE for creating pulls in AVID."""
+    edl_metadata, events = load_events(json_file_path) # Load JSON file
+    output_paths = {'pulls': ale_pulls_file_path}
+    if consolidate_gap is not None: # Map consolidated pulls back to their VFX IDs
+        output_paths['pulls_map'] = os.path.splitext(ale_pulls_file_path)[0] + OUTPUTS['pulls_map'][0]
+    write_outputs(edl_metadata, events, output_paths)
+
+
+def export_pulls_edl(json_file_path: str, edl_pulls_file_path: str):
+    """Export an EDL for cutting in pulls in AVID."""
+    edl_metadata, events = load_events(json_file_path) # Load JSON file
+    write_outputs(edl_metadata, events, {'edl_pulls': edl_pulls_file_path})
+
+
+def export_dummy_edl(json_file_path: str, dummy_edl_file_path: str):
+    """Export a Dummy EDL of VFX in AVID."""
+    edl_metadata, events = load_events(json_file_path) # Load JSON file
+    write_outputs(edl_metadata, events, {'dummy_edl': dummy_edl_file_path})
 
 
 def export_google_tab(json_file_path: str, google_file_path: str):
     """Export a TAB file to import into a Spreadsheet."""
-    
-    with open(json_file_path) as input_file:    # Open JSON file
-        json_file = json.load(input_file)   # Load JSON file
-    if os.path.exists(google_file_path): os.remove(google_file_path)    # Remove file if it exists
+    edl_metadata, events = load_events(json_file_path) # Load JSON file
+    write_outputs(edl_metadata, events, {'google': google_file_path})
+
+
+def diff_events(old_events: list, new_events: list) -> list:
+    """Compares two cuts, returns (status, old event, new event) for each changed event in new cut order, removed events last.
+    Status is added, removed, trimmed (source range changed), renamed (same source, new VFX ID) or moved (same source, new record position)."""
+    old_by_digest = {}
+    for old_event in old_events:
+        old_by_digest.setdefault(old_event.digest(), []).append(old_event)
+
+    pending = [] # New events without an identical old event
+    for new_event in new_events:
+        same_events = old_by_digest.get(new_event.digest())
+        if same_events: # Unchanged event, skipped entirely
+            same_events.pop()
+        else:
+            pending.append(new_event)
+    remaining = [old_event for same_events in old_by_digest.values() for old_event in same_events] # Old events changed or removed
+
+    old_by_id = {}
+    for old_event in remaining:
+        old_by_id.setdefault(old_event.vfx_id, []).append(old_event)
+    pairs = [] # (old event or None, new event)
+    for new_event in pending: # Match by VFX ID and reel first
+        candidates = old_by_id.get(new_event.vfx_id, [])
+        old_event = next((old_event for old_event in candidates if old_event.reel == new_event.reel), None)
+        if old_event:
+            candidates.remove(old_event)
+        pairs.append([old_event, new_event])
+
+    old_by_reel = {}
+    for candidates in old_by_id.values():
+        for old_event in candidates:
+            old_by_reel.setdefault(old_event.reel, []).append(old_event)
+    for pair in pairs: # Then by reel and overlapping source range, for renamed VFX IDs
+        if pair[0] is None:
+            new_event = pair[1]
+            candidates = old_by_reel.get(new_event.reel, [])
+            old_event = next((old_event for old_event in candidates if old_event.source_start < new_event.source_end and \
+                              new_event.source_start < old_event.source_end), None)
+            if old_event:
+                candidates.remove(old_event)
+                pair[0] = old_event
+
+    changes = []
+    for old_event, new_event in pairs:
+        if old_event is None:
+            changes.append(('added', None, new_event))
+        elif (old_event.source_start, old_event.source_end) != (new_event.source_start, new_event.source_end):
+            changes.append(('trimmed', old_event, new_event))
+        elif old_event.vfx_id != new_event.vfx_id: # Pull and clip names change with the VFX ID
+            changes.append(('renamed', old_event, new_event))
+        else:
+            changes.append(('moved', old_event, new_event)) # Same source range and VFX ID, new record position or track
+    changes.extend(('removed', old_event, None) for candidates in old_by_reel.values() for old_event in candidates)
+    return changes
+
+
+def export_diff(old_json_file_path: str, new_file_path: str):
+    """Compares a new cut (EDL or JSON) with the JSON of the previous one, exports the change list and the pulls of added, trimmed and renamed events only."""
+    edl_metadata, old_events = load_events(old_json_file_path) # Load previous JSON file
+    new_filename = os.path.splitext(new_file_path)[0] # Remove extension from new file
+    if new_file_path.lower().endswith('.edl'): # Parse new EDL and keep its JSON for the next diff
+        edl_metadata = {
+            "edl_title": "",
+            "edl_fcm": "",
+        }
+        try:
+            new_events = list(iter_edl_events(new_file_path, edl_metadata))
+        except FileNotFoundError:
+            print(f"Error: EDL file not found: {new_file_path}") # Print error message
+            return
+        write_outputs(edl_metadata, new_events, {'json': new_filename + '.json'})
+    else:
+        edl_metadata, new_events = load_events(new_file_path) # Load new JSON file
+
+    with timed('diff'):
+        changes = diff_events(old_events, new_events)
+    changes_file_path = new_filename + "_changes.txt"  # Change list output file
+    heading = 'Status' + '\t' + 'VFX ID' + '\t' + 'Old VFX ID' + '\t' + 'Tape' + '\t' + 'Old Start' + '\t' + 'Old End' + '\t' + 'Start' + '\t' + \
+    'End' + '\t' + 'Head Delta' + '\t' + 'Tail Delta' + '\t' + 'Record Start' + '\t' + 'Record Delta' # Define change list heading
     try:
-        with open(google_file_path, 'a') as output_file:    # Open TAB file
-            heading = '#' + '\t' + 'Name' + '\t' + 'Frame' + '\t' + 'Comments' + '\t' + 'Status' + '\t' + 'Date' + '\t' + 'Duration' + '\t' + 'Start' + '\t' +\
-            'End' + '\t' + 'Frame Count Duration' + '\t' + 'Tape'   # Define TAB heading
-            output_file.write(heading + '\n')   # Write heading to TAB file
-            counter = 1  # Define counter of events in JSON file
-            for i in range(len(json_file['events'])):   # Loop through JSON file
-                start_TC = Timecode(fps, json_file['events'][i]['source_start_TC']) # Define start timecode
-                end_TC = Timecode(fps, json_file['events'][i]['source_end_TC']) # Define end timecode
-                duration = end_TC - start_TC    # Define duration
-                number_of_frames = duration.frames  # Define number of frames
-                
-                google_file_line = str(counter) + '\t' +  json_file['events'][i]['VFX ID'] + '\t' + '\t' + '\t' + '\t' + '\t' + str(duration) + '\t' + json_file['events'][i]['source_start_TC'] + '\t' +\
-                json_file['events'][i]['source_end_TC'] + '\t' + str(number_of_frames) + '\t' + json_file['events'][i]['reel']  # Define TAB file line
-                output_file.write(google_file_line + '\n')  # Write line to TAB file
-                counter += 1    # Increment counter
-            print(f"Succesfully exported TAB file: {google_file_path}")   # Print success message
+        with atomic_write(changes_file_path) as output_file:
+            output_file.write(heading + '\n')
+            for status, old_event, new_event in changes:
+                event = new_event or old_event
+                old_range = [frames_to_tc(old_event.source_start, fps), frames_to_tc(old_event.source_end, fps)] if old_event else ['', '']
+                new_range = [frames_to_tc(new_event.source_start, fps), frames_to_tc(new_event.source_end, fps)] if new_event else ['', '']
+                deltas = [str(new_event.source_start - old_event.source_start), str(new_event.source_end - old_event.source_end),
+                          frames_to_tc(new_event.record_start, fps), str(new_event.record_start - old_event.record_start)] if old_event and new_event else \
+                         ['', '', frames_to_tc(event.record_start, fps) if new_event else '', '']
+                changes_file_line = '\t'.join([status, new_event.vfx_id if new_event else '', old_event.vfx_id if old_event else '', event.reel] + \
+                                              old_range + new_range + deltas) # Define change list line
+                output_file.write(changes_file_line + '\n')
+        print(f"Succesfully exported change list: {changes_file_path}")  # Print success message
     except Exception as e:  # Catch exception
-        print(f"Error writing {google_file_path}: {e}")  # Print error message
+        print(f"Error writing {changes_file_path}: {e}")  # Print error message
+        return
 
+    counts = {status: 0 for status in ('added', 'removed', 'trimmed', 'renamed', 'moved')}
+    for status, old_event, new_event in changes:
+        counts[status] += 1
+    print(f"{len(new_events) - len(changes) + counts['removed']} unchanged, " + ', '.join(f"{count} {status}" for status, count in counts.items()))
+
+    pull_events = [new_event for status, old_event, new_event in changes if status in ('added', 'trimmed', 'renamed')] # Only these need new pulls
+    output_paths = {'pulls': new_filename + '_changes.ALE', 'edl_pulls': new_filename + '_changes_pulls.edl',
+                    'pulls_map': new_filename + '_changes' + OUTPUTS['pulls_map'][0]}
+    for file_path in output_paths.values():
+        if os.path.exists(file_path): os.remove(file_path) # Remove pulls of a previous run, they would contradict the change list
+    if consolidate_gap is None:
+        del output_paths['pulls_map'] # Map only consolidated pulls back to their VFX IDs
+    if pull_events:
+        write_outputs(edl_metadata, pull_events, output_paths)
+
+
+class VfxIdIndex:
+    """Index of events by VFX ID, matches Avid bin clip names to events in one pass over the bin."""
+
+    def __init__(self, events: list):
+        self.positions_by_id = {} # VFX ID -> positions of its events
+        for position, event in enumerate(events):
+            if event.vfx_id: # Events without VFX ID can not be matched
+                self.positions_by_id.setdefault(event.vfx_id, []).append(position)
+        self._automaton = None # Substring automaton, built on first fallback
+
+    def match(self, name: str) -> list:
+        """Returns the positions of the events whose VFX ID is in name, in event order."""
+        tokens = name.split('_')
+        for end in range(len(tokens), 0, -1): # Exact lookup of the name and its _ prefixes, longest first
+            positions = self.positions_by_id.get('_'.join(tokens[:end]))
+            if positions:
+                return positions
+        return self._search(name) # VFX ID not at the start of the name
+
+    def _build_automaton(self):
+        """Builds an Aho-Corasick automaton over all VFX IDs."""
+        goto = [{}] # Transitions of each state
+        output = [[]] # VFX IDs ending at each state
+        for vfx_id in self.positions_by_id:
+            state = 0
+            for char in vfx_id:
+                if char not in goto[state]:
+                    goto.append({})
+                    output.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            output[state].append(vfx_id)
+
+        fail = [0] * len(goto) # Failure links, breadth first from the root
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                output[next_state] = output[next_state] + output[fail[next_state]]
+        self._automaton = (goto, fail, output)
+
+    def _search(self, name: str) -> list:
+        """Returns the positions of the events whose VFX ID is anywhere in name."""
+        if self._automaton is None:
+            self._build_automaton()
+        goto, fail, output = self._automaton
+        found = set()
+        state = 0
+        for char in name:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found.update(output[state])
+        if len(found) == 1:
+            return self.positions_by_id[found.pop()]
+        return sorted(position for vfx_id in found for position in self.positions_by_id[vfx_id])
+
+
+def clip_version(name: str) -> int:
+    """Returns the version number of a clip name (EPSV_08_015_v012_comp is 12), 0 if it has none."""
+    versions = VERSION_RE.findall(name)
+    return int(versions[-1]) if versions else 0
+
+
+def iter_bin_names(bin_file_path: str):
+    """Streams the Name column of an AVID bin exported as TAB delimited text."""
+    with open(bin_file_path, newline='') as bin_file:
+        for row in csv.DictReader(bin_file, delimiter='\t'):
+            if row.get('Name'): # Skip empty Name cells
+                yield row['Name']
+
+
+def export_final_vfx_edl(json_file_path: str, final_vfx_bin: str, edl_final_file_path: str, latest_only: bool = False):
+    """Export an EDL for cutting in final vfx in AVID, optionally only the highest version of each shot."""
+    edl_metadata, events = load_events(json_file_path) # Load JSON file
+    with timed('bin_matching'):
+        vfx_id_index = VfxIdIndex(events) # Index events by VFX ID
+    write_final_vfx_edl(EventColumns(events), vfx_id_index, final_vfx_bin, edl_final_file_path, latest_only)
+
+
+def write_final_vfx_edl(columns: EventColumns, vfx_id_index: VfxIdIndex, final_vfx_bin: str, edl_final_file_path: str, latest_only: bool = False):
+    """Matches an AVID bin to indexed events and writes the final vfx EDL, and the bin names matching no VFX ID."""
+    events = columns.events
+    matches = [] # Bin names with the positions of their events, in bin order
+    unmatched = [] # Bin names matching no VFX ID
+    with timed('bin_matching'):
+        for bin_name in iter_bin_names(final_vfx_bin):  # Loop through AVID bin file
+            positions = vfx_id_index.match(bin_name)
+            if positions:
+                matches.append((bin_name, positions))
+            else:
+                unmatched.append(bin_name)
+    if metrics is not None:
+        metrics.count('bin_rows_matched', len(matches))
+        metrics.count('bin_rows_unmatched', len(unmatched))
+
+    if latest_only: # Keep the highest version of each shot, first one in the bin on ties
+        latest = {}
+        for match in matches:
+            shot = tuple(match[1]) # Events matched by the bin name
+            if shot not in latest or clip_version(match[0]) > clip_version(latest[shot][0]):
+                latest[shot] = match
+        kept = set(map(id, latest.values()))
+        matches = [match for match in matches if id(match) in kept]
 
-def export_final_vfx_edl(json_file_path: str, final_vfx_bin: str, edl_final_file_path: str):
-    """Export an EDL for cutting in final vfx in AVID."""
-    AVID_bin_data = read_csv(final_vfx_bin, delimiter='\t') # Read AVID bin file
-    
-    with open(json_file_path) as input_file:    # Open JSON file
-        json_file = json.load(input_file)   # Load JSON file
-    
-    if os.path.exists(edl_final_file_path): os.remove(edl_final_file_path)  # Remove file if it exists
     try:
-        with open(edl_final_file_path, 'a') as output_file:   # Open EDL file
-            heading = 'TITLE: ' + os.path.splitext(edl_final_file_path)[0]+ '\n'\
-            'FCM: NON-DROP FRAME\n'    # Define EDL heading
-            output_file.write(heading)  # Write heading to EDL file
-            for i in range(len(AVID_bin_data['Name'])):  # Loop through AVID bin file
-                for j in range(len(json_file['events'])):   # Loop through JSON file
-                    if json_file['events'][j]['VFX ID'] in AVID_bin_data['Name'][i]:    # Check if VFX ID is in AVID bin file name
-                        edl_final_file_line = json_file['events'][j]['event_number'] + ' ' + AVID_bin_data['Name'][i] + ' ' + json_file['events'][j]['track'] + ' ' + \
-                        json_file['events'][j]['transition'] + ' ' + json_file['events'][j]['source_start_TC'] + ' ' + json_file['events'][j]['source_end_TC'] + ' ' + \
-                        json_file['events'][j]['record_start_TC'] + ' ' + json_file['events'][j]['record_end_TC']   # Define EDL file line
-                        output_file.write(edl_final_file_line + '\n')   # Write line to EDL file
+        with timed('write:final_vfx_edl'), atomic_write(edl_final_file_path) as output_file:   # Open EDL file
+            output_file.write(edl_heading(edl_final_file_path))  # Write heading to EDL file
+            timecodes_column = columns.edl_timecodes()
+            for bin_name, positions in matches:
+                for position in positions:   # Loop through matching events
+                    edl_final_file_line = edl_event_line(events[position], bin_name, timecodes_column[position])   # Define EDL file line
+                    output_file.write(edl_final_file_line + '\n')   # Write line to EDL file
             print(f"Succesfully exported EDL file: {edl_final_file_path}")  # Print success message
     except Exception as e:  # Catch exception
         print(f"Error writing {edl_final_file_path}: {e}")  # Print error message
 
+    unmatched_file_path = os.path.splitext(edl_final_file_path)[0] + "_unmatched.txt" # Report of bin names matching no VFX ID
+    if os.path.exists(unmatched_file_path): os.remove(unmatched_file_path) # Remove report of a previous run
+    if unmatched:
+        try:
+            with atomic_write(unmatched_file_path) as output_file:
+                output_file.write('\n'.join(unmatched) + '\n') # One bin name per line
+            print(f"{len(unmatched)} bin names matched no VFX ID, see: {unmatched_file_path}")  # Print warning message
+        except Exception as e:  # Catch exception
+            print(f"Error writing {unmatched_file_path}: {e}")  # Print error message
+
+
+def is_bin_file(file_path: str) -> bool:
+    """Checks if a file is an AVID bin exported as TAB delimited text, from its Name column."""
+    with open(file_path, newline='') as bin_file:
+        return 'Name' in bin_file.readline().rstrip('\r\n').split('\t')
+
+
+def watch_cut(edl_file: str, edl_metadata: dict, events: list) -> dict:
+    """Returns the state kept warm between watched files: the cut outputs are named after, its timecode columns and VFX ID index."""
+    with timed('bin_matching'):
+        vfx_id_index = VfxIdIndex(events) # Index events by VFX ID, ready for the next bin
+    return {"filename": os.path.splitext(edl_file)[0], "columns": EventColumns(events), "vfx_id_index": vfx_id_index}
+
+
+class FolderWatcher:
+    """Scans a folder for EDLs and bins, reports each new or modified file once its size and modification time stop changing
+    for WATCH_SETTLE seconds."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.seen = None # Processed files, those of the first scan are not processed
+        self.pending = {} # Files changing: size and modification time, time they were first seen with them
+        self.scan_error = None # Error of the previous scan, reported once
+        self.stable_files()
+
+    def scan(self) -> dict:
+        """Returns the size and modification time of the EDLs and TAB files of the folder, outputs of this script excepted.
+        Files removed or renamed while scanning are left out, an unreadable folder raises OSError."""
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                name = entry.name.lower()
+                if not name.endswith(('.edl', '.txt')) or name.endswith(OUTPUT_SUFFIXES):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError: # Gone since the listing, seen again on the next scan if it comes back
+                    continue
+        return files
+
+    def stable_files(self) -> list:
+        """Returns the files settled and not processed yet, with the time they last changed. Partially written files wait for the next scans."""
+        try:
+            files = self.scan()
+        except OSError as e: # Folder unreachable (network share dropped...), retry on the next scan
+            if str(e) != self.scan_error:
+                print(f"Error scanning {self.directory}: {e}, retrying")  # Print error message
+                self.scan_error = str(e)
+            return []
+        if self.scan_error:
+            print(f"Scanning {self.directory} again")
+            self.scan_error = None
+        if self.seen is None: # First scan
+            self.seen = files
+            return []
+        now = time.perf_counter()
+        stable = []
+        for file_path, stat in files.items():
+            if self.seen.get(file_path) == stat: # Already processed
+                continue
+            pending_stat, since = self.pending.get(file_path, (None, now))
+            if pending_stat != stat: # New or still being written
+                self.pending[file_path] = (stat, now)
+            elif now - since >= WATCH_SETTLE: # Unchanged long enough, done writing
+                stable.append((file_path, since))
+                self.seen[file_path] = stat
+                del self.pending[file_path]
+        self.pending = {file_path: pending for file_path, pending in self.pending.items() if file_path in files} # Forget removed files
+        return sorted(stable)
+
+
+def watch_bin_cut(cuts: dict, bin_file_path: str) -> tuple:
+    """Returns the cut matching the most names of a bin, the latest processed on ties, with the number of bin names and of matched names."""
+    bin_names = list(iter_bin_names(bin_file_path))
+    best_cut, best_matched = None, -1
+    with timed('bin_matching'):
+        for cut in cuts.values(): # Oldest first, a later cut wins ties
+            matched = sum(1 for bin_name in bin_names if cut['vfx_id_index'].match(bin_name))
+            if matched >= best_matched:
+                best_cut, best_matched = cut, matched
+    return best_cut, len(bin_names), best_matched
+
+
+def start_watchdog(directory: str, wake):
+    """Starts a watchdog observer (inotify, FSEvents, ...) that wakes the folder scan on changes, returns None if watchdog is not installed."""
+    try:
+        from watchdog.observers import Observer # Optional, the scan polls without it
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    class WakeHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wake.set()
+
+    observer = Observer()
+    observer.schedule(WakeHandler(), directory)
+    observer.start()
+    return observer
+
+
+def watch_worker(work_queue, outputs: list, latest_only: bool = False, db_file_path: str = None, cuts: dict = None):
+    """Processes the files of the watch queue until it gets None: a turnover of EDLs, a final vfx EDL of bins against the cut
+    (EDL file name: warm cut state) matching most of their names. Bins matching mostly no cut are not conformed."""
+    cuts = cuts if cuts is not None else {}
+    while True:
+        item = work_queue.get()
+        if item is None:
+            return
+        file_path, changed = item
+        try:
+            if file_path.lower().endswith('.edl'):
+                parsed = turnover(file_path, outputs) # Call function to write all outputs from one EDL parse
+                if not parsed:
+                    continue
+                cut = watch_cut(file_path, *parsed)
+                cuts.pop(cut['filename'], None) # New version of a cut goes last, it wins ties
+                cuts[cut['filename']] = cut
+                if db_file_path:
+                    store_ingest_events(db_file_path, file_path, *parsed) # Keep the cut in the project store
+            elif is_bin_file(file_path):
+                if not cuts:
+                    print(f"Error: no EDL processed yet for bin: {file_path}") # Print error message
+                    continue
+                cut, bin_rows, matched = watch_bin_cut(cuts, file_path)
+                if matched * 2 < bin_rows: # Most names match no cut, likely the EDL of its reel has not landed yet
+                    print(f"Error: only {matched} of {bin_rows} bin names match a VFX ID of {cut['filename']}, bin not conformed: {file_path}") # Print error message
+                    continue
+                print(f"Matched {matched} of {bin_rows} bin names of {file_path} to {cut['filename']}")
+                write_final_vfx_edl(cut['columns'], cut['vfx_id_index'], file_path, cut['filename'] + "_vfx_final.edl", latest_only)
+            else: # TAB file without a Name column, not a bin
+                continue
+            print(f"Processed {file_path} {time.perf_counter() - changed:.3f} s after it changed")
+        except Exception as e: # Keep watching, report the error
+            print(f"Error processing {file_path}: {e}") # Print error message
+
+
+def watch_folder(directory: str, outputs: list, latest_only: bool = False, db_file_path: str = None):
+    """Watches a folder until interrupted: each EDL dropped in gets a turnover with the requested outputs, each AVID bin (TAB)
+    a final vfx EDL against the cut matching most of its names, starting from the JSONs of the folder. Files are processed in a worker thread."""
+    if not os.path.isdir(directory):
+        print(f"Error: watch folder not found: {directory}") # Print error message
+        return
+
+    cuts = {} # Warm cut state by EDL file name, oldest first
+    json_files = [os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith('.json')]
+    for json_file_path in sorted(json_files, key=os.path.getmtime): # Warm start from the cuts of the folder, one per reel
+        try:
+            cut = watch_cut(json_file_path, *load_events(json_file_path))
+            cuts[cut['filename']] = cut
+            print(f"Loaded {len(cut['columns'].events)} events from {json_file_path}")
+        except Exception as e:  # Catch exception
+            print(f"Error loading {json_file_path}: {e}")  # Print error message
+
+    import queue # Deferred, only watch mode needs them
+    import threading
+    work_queue = queue.Queue(maxsize=WATCH_QUEUE_SIZE) # The scan waits when the worker falls behind
+    worker = threading.Thread(target=watch_worker, args=(work_queue, outputs, latest_only, db_file_path, cuts), daemon=True)
+    worker.start()
+    wake = threading.Event()
+    observer = start_watchdog(directory, wake)
+    watcher = FolderWatcher(directory)
+    print(f"Watching {directory} ({'watchdog' if observer else 'polling'}), press Ctrl+C to stop")
+    try:
+        while True:
+            for item in watcher.stable_files():
+                work_queue.put(item)
+            wake.wait(WATCH_INTERVAL if watcher.pending or observer is None else WATCH_IDLE_INTERVAL) # Poll, or wait for a watchdog event
+            wake.clear()
+    except KeyboardInterrupt:
+        print(f"Stopped watching {directory}")
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+        work_queue.put(None) # Let the worker finish the queued files
+        worker.join()
+
 
 if __name__ == "__main__":
 
-    global FILM_CODE, fps, handles, VIDEO_FORMAT, AUDIO_FORMAT
-    FILM_CODE='EPSV' # Define film code
-    fps='24'  # Define frame rate
-    handles=10  # Define handles
+    if getattr(sys, 'frozen', False): # PyInstaller binary, batch worker processes start by running it again
+        import multiprocessing # Deferred, only needed when frozen
+        multiprocessing.freeze_support() # Run the worker instead of the CLI in spawned processes
 
     parser = argparse.ArgumentParser(description='Import EDL, create JSON and export various stuff for AVID')   # Define parser
 
     parser.add_argument('-e', '--edl', metavar =(''), help='Import an EDL and export a JSON, requires an EDL')  # Define arguments
+    parser.add_argument('-n', '--ndjson', metavar =(''), help='Import an EDL and export a NDJSON (one event per line), requires an EDL')  # Define arguments
+    parser.add_argument('-t', '--turnover', metavar =(''), help='Import an EDL once and export all the outputs listed by -o, requires an EDL')  # Define arguments
+    parser.add_argument('-b', '--batch', metavar =(''), help='Turnover of every EDL in a directory or matching a glob pattern, exports the outputs listed by -o')  # Define arguments
+    parser.add_argument('-w', '--workers', type=int, metavar =(''), help='With -b, number of worker processes (default: number of CPUs)')  # Define arguments
+    parser.add_argument('--summary', metavar =(''), help='With -b, also write the batch summary to this JSON file')  # Define arguments
+    parser.add_argument('-o', '--outputs', metavar =(''), default=','.join(DEFAULT_OUTPUTS), help='With -t, -b or --watch, comma separated outputs among: ' + ', '.join(OUTPUTS) + ' (default: ' + ','.join(DEFAULT_OUTPUTS) + ')')  # Define arguments
     parser.add_argument('-m', '--markers', metavar =(''), help='Export markers for AVID, requires a JSON')  # Define arguments
     parser.add_argument('-s', '--subcaps', metavar =(''), help='Export subcaps file for AVID, requires a JSON') # Define arguments
     parser.add_argument('-p', '--pulls', metavar =(''), help='Export ALE file for creating pulls in AVID bin, requires a JSON') # Define arguments
     parser.add_argument('-x', '--edl_pulls', metavar =(''), help='Export EDL for cutting in pulls in AVID, requires a JSON')    # Define arguments
     parser.add_argument('-d', '--dummy_edl', metavar =(''), help='Export Dummy EDL of VFX in AVID, requires a JSON')        # Define arguments
     parser.add_argument('-g', '--google', metavar =(''), help='Export TAB file to import into a Spreadsheet, requires a JSON')  # Define arguments
+    parser.add_argument('--diff', nargs=2, metavar=('JSON file', 'EDL or JSON file'), help='Compare a new cut with the JSON of the previous one, export the change list and the pulls of changed shots')  # Define arguments
+    parser.add_argument('-c', '--consolidate', type=int, nargs='?', const=0, metavar=('GAP'), help='Merge pulls of the same reel that overlap or are at most GAP frames apart (default GAP: 0), with a pulls map')  # Define arguments
+    parser.add_argument('-l', '--latest', action='store_true', help='With -f or --watch, use only the highest version of each shot in the bin')  # Define arguments
+    parser.add_argument('-r', '--fps', choices=FRAME_RATES, default=fps, help='Frame rate of the EDL and timecodes (default: %(default)s)')  # Define arguments
     parser.add_argument('-f', '--final', nargs=2, metavar=('JSON file', 'BIN file'), help='Export EDL for cutting in final vfx in AVID, requires a JSON and an AVID bin (TAB)') # Define arguments
+    parser.add_argument('--db', metavar =(''), help='SQLite project store of all cuts, for --ingest, queries, -t and --watch (also ingest their EDLs)')  # Define arguments
+    parser.add_argument('--ingest', metavar =(''), help='Ingest an EDL or JSON, or every EDL of a directory or glob pattern, into the project store given by --db')  # Define arguments
+    parser.add_argument('--cut', metavar =(''), help='Cut read when a project store (.db) is given in place of a JSON, and by --overlap (default: latest ingested)')  # Define arguments
+    parser.add_argument('--shot', metavar =(''), help='With --db, list a VFX ID in every cut')  # Define arguments
+    parser.add_argument('--camera', metavar =(''), help='With --db, list the shots using a camera file (reel) in every cut, with --overlap only those overlapping its source range')  # Define arguments
+    parser.add_argument('--overlap', nargs=2, metavar=('START', 'END'), help='With --db, list the shots whose record overlaps START END (included) in a cut')  # Define arguments
+    parser.add_argument('--watch', metavar =(''), help='Watch a folder: new EDLs get the outputs listed by -o, new AVID bins (TAB) a final vfx EDL of the EDL matching most of their names (uses watchdog if installed)')  # Define arguments
+    parser.add_argument('--metrics-json', metavar =(''), help='Write stage timings and counters of the run to this JSON file')  # Define arguments
+    parser.add_argument('--profile', metavar =(''), help='Write a cProfile dump of the run to this file, for pstats or snakeviz')  # Define arguments
       
     args = parser.parse_args() # Call function to parse arguments
 
     if len(sys.argv) == 1:  # Check if no arguments are given
         parser.print_help(sys.stderr)  # Print help message
         sys.exit(0) # Exit program
+    fps = args.fps # Frame rate used by all functions
+    consolidate_gap = args.consolidate # Pull consolidation gap, None when not consolidating
+    store_cut_name = args.cut # Cut read from a project store, None for the latest
+    if (args.ingest or args.shot or args.camera or args.overlap) and not args.db:
+        parser.error('--ingest, --shot, --camera and --overlap require --db') # Print error message and exit
+    if args.overlap and not all(re.fullmatch(TC_PATTERN, tc) for tc in args.overlap):
+        parser.error('--overlap requires two HH:MM:SS:FF timecodes') # Print error message and exit
     
-    if args.edl:
+    outputs = [output.strip() for output in args.outputs.split(',') if output.strip()] # Requested outputs for -t, -b and --watch
+    unknown_outputs = [output for output in outputs if output not in OUTPUTS]
+    if unknown_outputs:
+        parser.error('unknown outputs: ' + ', '.join(unknown_outputs)) # Print error message and exit
+    if consolidate_gap is not None and 'pulls' in outputs and 'pulls_map' not in outputs:
+        outputs.append('pulls_map') # Consolidated pulls come with their map
+
+    if args.metrics_json:
+        metrics = Metrics() # Collect metrics, None otherwise so instrumentation costs nothing
+    if args.profile:
+        import cProfile # Deferred, only profiling needs it
+        profiler = cProfile.Profile()
+        profiler.enable()
+    run_start = time.perf_counter()
+
+    if args.turnover:
+        parsed = turnover(args.turnover, outputs) # Call function to write all outputs from one EDL parse
+        if parsed and args.db:
+            store_ingest_events(args.db, args.turnover, *parsed) # Keep the cut in the project store
+    elif args.watch:
+        watch_folder(args.watch, outputs, args.latest, args.db) # Call function to process files dropped in a folder until interrupted
+    elif args.ingest:
+        store_ingest(args.db, args.ingest) # Call function to ingest cuts into the project store
+    elif args.shot or args.camera or args.overlap:
+        query_store(args.db, args.shot, args.camera, args.overlap) # Call function to query the project store
+    elif args.batch:
+        batch_turnover(args.batch, outputs, args.workers, args.summary) # Call function to run a turnover of every EDL
+    elif args.edl:
         edl_file_path =  args.edl # EDL input 
         edl_filename = os.path.splitext(edl_file_path)[0] # Remove extension from EDL file
         json_file_path = edl_filename + ".json"  #  JSON output file
         edl_to_json(edl_file_path, json_file_path) # Call function to write edl to json
+    elif args.ndjson:
+        edl_file_path =  args.ndjson # EDL input
+        edl_filename = os.path.splitext(edl_file_path)[0] # Remove extension from EDL file
+        ndjson_file_path = edl_filename + ".ndjson"  #  NDJSON output file
+        edl_to_json(edl_file_path, ndjson_file_path, ndjson=True) # Call function to write edl to ndjson
     elif args.markers:
         json_file_path = args.markers # JSON file input
-        json_filename = os.path.splitext(json_file_path)[0] # Remove extension from JSON file
+        json_filename = input_filename(json_file_path) # Remove extension from JSON file, or cut of a project store
         markers_file_path = json_filename + "_markers.txt"  # Markers output file    
         json_to_markers(json_file_path, markers_file_path) # Call function to write json to markers
     elif args.subcaps:
         json_file_path = args.subcaps # JSON file input
-        json_filename = os.path.splitext(json_file_path)[0] # Remove extension from JSON file
+        json_filename = input_filename(json_file_path) # Remove extension from JSON file, or cut of a project store
         sub_file_path = json_filename + "_subcaps.txt"  # Subcaps output file
         json_to_subcaps(json_file_path, sub_file_path) # Call function to write json to subcaps
     elif args.pulls:
         json_file_path = args.pulls # JSON file input
-        json_filename = os.path.splitext(json_file_path)[0] # Remove extension from JSON file
+        json_filename = input_filename(json_file_path) # Remove extension from JSON file, or cut of a project store
         ale_pulls_file_path = json_filename + ".ALE"  # ALE output file
         export_ale_pulls(json_file_path, ale_pulls_file_path) # Call function to write json to ALE
     elif args.edl_pulls:
         json_file_path = args.edl_pulls # JSON file input
-        json_filename = os.path.splitext(json_file_path)[0] # Remove extension from JSON file
+        json_filename = input_filename(json_file_path) # Remove extension from JSON file, or cut of a project store
         edl_pulls_file_path = json_filename + "_pulls.edl"  # ALE output file
         export_pulls_edl(json_file_path, edl_pulls_file_path)   # Call function to write json to EDL for cutting in pulls in AVID
     elif args.dummy_edl:
         json_file_path = args.dummy_edl # JSON file input
-        json_filename = os.path.splitext(json_file_path)[0] # Remove extension from JSON file
+        json_filename = input_filename(json_file_path) # Remove extension from JSON file, or cut of a project store
         dummy_edl_file_path = json_filename + "_dummy.edl"  # Dummy EDL output file
         export_dummy_edl(json_file_path, dummy_edl_file_path) # Call function to write json to dummy EDL
     elif args.google:
         json_file_path = args.google # JSON file input
-        json_filename = os.path.splitext(json_file_path)[0] # Remove extension from JSON file
+        json_filename = input_filename(json_file_path) # Remove extension from JSON file, or cut of a project store
         google_file_path = json_filename + "_TAB.txt"  # ALE output file
         export_google_tab(json_file_path, google_file_path) # Call function to write json to TAB file
+    elif args.diff:
+        export_diff(args.diff[0], args.diff[1]) # Call function to export changes between two cuts
     elif args.final:
         json_file_path = args.final[0] # JSON file input
-        json_filename = os.path.splitext(json_file_path)[0] # Remove extension from JSON file
+        json_filename = input_filename(json_file_path) # Remove extension from JSON file, or cut of a project store
         edl_final_file_path = json_filename + "_vfx_final.edl"  # EDL output file
         final_vfx_bin = args.final[1] # AVID bin file input
-        export_final_vfx_edl(json_file_path, final_vfx_bin, edl_final_file_path) # Call function to write json to EDL for cutting in final vfx in AVID
\ No newline at end of file
+        export_final_vfx_edl(json_file_path, final_vfx_bin, edl_final_file_path, args.latest) # Call function to write json to EDL for cutting in final vfx in AVID
+
+    if args.profile:
+        profiler.disable()
+        try:
+            profiler.dump_stats(args.profile) # Write cProfile dump
+            print(f"Succesfully exported profile: {args.profile}")  # Print success message
+        except Exception as e:  # Catch exception
+            print(f"Error writing {args.profile}: {e}")  # Print error message
+    if args.metrics_json:
+        run_metrics = {"total_seconds": time.perf_counter() - run_start, **metrics.to_dict()}
+        try:
+            with atomic_write(args.metrics_json) as output_file:
+                json.dump(run_metrics, output_file, indent=4) # Write metrics to JSON file
+            print(f"Succesfully exported metrics: {args.metrics_json}")  # Print success message
+        except Exception as e:  # Catch exception
+            print(f"Error writing {args.metrics_json}: {e}")  # Print error message